@@ -0,0 +1,73 @@
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from telethon.errors import BotMethodInvalidError
+
+async def _iter_history(client, chat_id: int, since_id: int, limit: int, page_size: int) -> AsyncIterator:
+    """
+    Messages postérieurs à since_id, du plus ancien au plus récent.
+    Un compte bot n'a pas accès à messages.getHistory : on lit alors par
+    plages d'ids (channels.getMessages) jusqu'à une page entièrement vide.
+    """
+    try:
+        async for message in client.iter_messages(chat_id, min_id=since_id, reverse=True, limit=limit):
+            yield message
+        return
+    except BotMethodInvalidError:
+        pass
+    next_id, fetched = since_id + 1, 0
+    while fetched < limit:
+        ids = list(range(next_id, next_id + min(page_size, limit - fetched)))
+        page = [m for m in await client.get_messages(chat_id, ids=ids) if m is not None]
+        if not page: return
+        for message in page:
+            yield message
+        fetched += len(page)
+        next_id = ids[-1] + 1
+
+async def refetch_messages(client, chat_id: int, ids: List[int],
+                           on_batch: Callable[[List], Awaitable[None]], batch_size: int = 100) -> int:
+    """
+    Relit des messages déjà vus (⏰ en attente) : leur édition pendant l'arrêt
+    n'apparaît pas dans l'historique postérieur au point de reprise.
+    Retourne le nombre de messages encore existants.
+    """
+    found = 0
+    for start in range(0, len(ids), batch_size):
+        page = [m for m in await client.get_messages(chat_id, ids=ids[start:start + batch_size]) if m is not None]
+        if page:
+            await on_batch(page)
+            found += len(page)
+    return found
+
+async def backfill_channel(client, chat_id: int, since_id: Optional[int],
+                           on_batch: Callable[[List], Awaitable[None]],
+                           limit: int = 5000, batch_size: int = 100) -> Optional[int]:
+    """
+    Rattrapage au démarrage : récupère l'historique du canal postérieur à
+    `since_id` par requêtes paginées et le transmet par lots à `on_batch`.
+    Retourne l'id du dernier message vu.
+    """
+    if not since_id:
+        print(f"ℹ️ Aucun point de reprise pour {chat_id}, rattrapage ignoré")
+        return since_id
+    print(f"⏪ Rattrapage de {chat_id} depuis le message {since_id} (max {limit})")
+    started = time.monotonic()
+    last_id = since_id
+    fetched = 0
+    batch = []
+    async for message in _iter_history(client, chat_id, since_id, limit, batch_size):
+        batch.append(message)
+        if len(batch) >= batch_size:
+            await on_batch(batch)
+            fetched += len(batch)
+            last_id = batch[-1].id
+            batch = []
+            print(f"⏪ {fetched} messages rattrapés (jusqu'à l'id {last_id})")
+    if batch:
+        await on_batch(batch)
+        fetched += len(batch)
+        last_id = batch[-1].id
+    elapsed = time.monotonic() - started
+    print(f"✅ Rattrapage terminé : {fetched} messages en {elapsed:.1f}s" +
+          (" (limite atteinte)" if fetched >= limit else ""))
+    return last_id
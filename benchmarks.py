@@ -0,0 +1,181 @@
+"""
+Bancs d'essai reproductibles des chemins critiques : comptage, anti-doublon,
+vérification des prédictions et rapports. Résultats en JSON pour comparer
+les exécutions entre elles.
+
+    python benchmarks.py --output bench.json
+    python benchmarks.py --compare bench.json --filter dedup
+"""
+import argparse, contextlib, io, json, os, platform, random, shutil, statistics, subprocess, sys, tempfile, time, timeit
+from typing import Callable, Dict, List, Optional
+
+def _messages(rng: random.Random) -> Dict[str, str]:
+    """Formes de messages représentatives du canal de statistiques"""
+    ranks = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+    def hand(suits, n=3):
+        return "".join(rng.choice(ranks) + rng.choice(suits) for _ in range(n))
+    emoji, bare = ("♠️", "♥️", "♦️", "♣️"), ("♠", "♥", "♦", "♣")
+    many = " - ".join(f"{i}({hand(emoji)})" for i in range(12))
+    return {
+        "emoji": f"#N742. ✅3({hand(emoji)}) - 2({hand(emoji, 2)}) #T15",
+        "bare": f"#N742. ✅3({hand(bare)}) - 2({hand(bare, 2)}) #T15",
+        "many_groups": f"#N742. ✅{many}",
+        "long_text": f"#N742. ✅3({hand(emoji)}) - 2({hand(emoji, 2)}) " + "commentaire " * 200,
+    }
+
+class Runner:
+    def __init__(self, repeat: int = 5, min_time: float = 0.2, name_filter: Optional[str] = None):
+        self.repeat = repeat
+        self.min_time = min_time
+        self.name_filter = name_filter
+        self.results: List[Dict] = []
+
+    def bench(self, name: str, func: Callable[[], object], number: Optional[int] = None):
+        """Chronomètre func ; `number` est calibré pour durer au moins min_time par série"""
+        if self.name_filter and self.name_filter not in name: return
+        # Les fonctions du bot affichent beaucoup : sortie standard neutralisée pendant la mesure
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            timer = timeit.Timer(func)
+            if number is None:
+                number, _ = timer.autorange()
+                number = max(1, int(number * self.min_time / 0.2))
+            runs = timer.repeat(repeat=self.repeat, number=number)
+        per_op = [r / number * 1e9 for r in runs]
+        result = {"name": name, "number": number, "repeat": self.repeat,
+                  "ns_per_op_min": round(min(per_op), 1), "ns_per_op_median": round(statistics.median(per_op), 1)}
+        self.results.append(result)
+        print(f"  {name:<48} {result['ns_per_op_min'] / 1000:>10.2f} µs/op (médiane {result['ns_per_op_median'] / 1000:.2f})",
+              file=sys.stderr)
+
+def bench_counter(run: Runner, rng: random.Random):
+    from card_counter import CardCounter
+    from card_parser import parse_message
+    counter = CardCounter()
+    for shape, text in _messages(rng).items():
+        group = counter.extract_first_group(text)
+        run.bench(f"counter.count_symbols[{shape}]", lambda g=group: counter.count_symbols(g))
+        run.bench(f"counter.add[{shape}]", lambda t=text: counter.add(t))
+        parsed = parse_message(text)
+        run.bench(f"counter.add_parsed[{shape}]", lambda p=parsed: counter.add(p))
+    batch = [text for text in _messages(rng).values()] * 250
+    run.bench("counter.add_many[1000 messages]", lambda: counter.add_many(batch))
+
+def bench_reports(run: Runner, rng: random.Random):
+    from card_counter import CardCounter
+    counter = CardCounter()
+    for text in list(_messages(rng).values()) * 500:
+        counter.add(text, at=time.time() - rng.randint(0, 3 * 3600))
+    totals = dict(counter._TOTAL)
+    run.bench("counter.build_report", counter.build_report)
+    def report_and_reset():
+        counter._TOTAL = dict(totals)  # même période pleine à chaque appel
+        return counter.report_and_reset()
+    run.bench("counter.report_and_reset", report_and_reset)
+    run.bench("counter.report_window[3h]", lambda: counter.report_window(180))
+
+def bench_dedup(run: Runner, rng: random.Random, data_dir: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        from persister import persister
+        from storage import create_backend
+        from yaml_manager import YAMLDataManager
+    for backend_name in ("yaml", "sqlite"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = YAMLDataManager(create_backend(backend_name, os.path.join(data_dir, backend_name)))
+            known = [f"#N{i}. ✅3(K♠️10♦️4♣️) - 2(J♥️5♠️) #{rng.random()}" for i in range(1000)]
+            for text in known:
+                manager.mark_message_processed(text, -100)
+            persister.flush()
+        run.bench(f"dedup.is_message_processed[{backend_name},hit]",
+                  lambda: manager.is_message_processed(known[rng.randrange(1000)], -100))
+        run.bench(f"dedup.is_message_processed[{backend_name},miss]",
+                  lambda: manager.is_message_processed("#N0. ✅ inconnu", -100))
+        seq = iter(range(10 ** 9))
+        run.bench(f"dedup.mark_message_processed[{backend_name}]",
+                  lambda: manager.mark_message_processed(f"#N{next(seq)}. ✅3(K♠️)", -100))
+        with contextlib.redirect_stdout(io.StringIO()):
+            persister.flush()
+            manager.close()
+
+def bench_verification(run: Runner, rng: random.Random):
+    from card_parser import parse_message
+    from predictor import CardPredictor
+    from scheduler import PredictionScheduler
+    from prediction_index import PredictionIndex
+    scheduler = PredictionScheduler(None, CardPredictor(), 0, 0)
+    for outstanding in (100, 500):
+        predicted = sorted(rng.sample(range(1, 1440), outstanding))
+        hit = f"#N{predicted[-1] + 2}. ✅3(K♠️10♦️) - 2(J♥️5♠️) #T15"
+        miss = "#N1500. ✅3(K♠️10♦️) - 2(J♥️5♠️) #T15"
+        run.bench(f"scheduler.verify[{outstanding} prédictions,hit]",
+                  lambda: scheduler.verify_prediction_from_message(hit, predicted))
+        run.bench(f"scheduler.verify[{outstanding} prédictions,miss]",
+                  lambda: scheduler.verify_prediction_from_message(miss, predicted))
+        parsed = parse_message(miss)
+        run.bench(f"scheduler.verify_parsed[{outstanding} prédictions,miss]",
+                  lambda: scheduler.verify_prediction_from_message(parsed, predicted))
+        # Prédictions en cours lues dans l'index du prédicteur (cas du bot)
+        scheduler.predictor.index = PredictionIndex.from_numbers(predicted)
+        run.bench(f"scheduler.verify_indexed[{outstanding} prédictions,hit]",
+                  lambda: scheduler.verify_prediction_from_message(hit))
+        run.bench(f"scheduler.verify_indexed[{outstanding} prédictions,miss]",
+                  lambda: scheduler.verify_prediction_from_message(parsed))
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(previous: Dict, current: Dict):
+    """Affiche le rapport nouveau/ancien par banc (> 1 = plus lent)"""
+    before = {r["name"]: r for r in previous.get("results", [])}
+    print(f"\n📊 Comparaison avec {previous.get('meta', {}).get('revision')}", file=sys.stderr)
+    for r in current["results"]:
+        old = before.get(r["name"])
+        if not old: continue
+        ratio = r["ns_per_op_min"] / old["ns_per_op_min"] if old["ns_per_op_min"] else float("inf")
+        flag = "⚠️" if ratio > 1.10 else ("✅" if ratio < 0.90 else "  ")
+        print(f"  {flag} {r['name']:<48} x{ratio:.2f}", file=sys.stderr)
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Bancs d'essai des chemins critiques")
+    parser.add_argument("--output", help="fichier JSON de résultats (sinon sortie standard)")
+    parser.add_argument("--compare", help="résultats JSON d'une exécution précédente")
+    parser.add_argument("--filter", help="n'exécuter que les bancs dont le nom contient ce texte")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="durée minimale d'une série (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # Les modules de stockage lisent BOT_DATA_DIR à l'import : rien n'est écrit dans data/
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    os.environ["BOT_DATA_DIR"] = data_dir
+    os.environ["PERSIST_FLUSH_INTERVAL"] = "3600"  # écritures vidées explicitement
+    run = Runner(args.repeat, args.min_time, args.filter)
+    try:
+        for suite in (bench_counter, bench_reports, bench_verification):
+            suite(run, random.Random(args.seed))
+        bench_dedup(run, random.Random(args.seed), data_dir)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    result = {
+        "meta": {"revision": _git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "seed": args.seed, "repeat": args.repeat},
+        "results": run.results,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✅ Résultats écrits dans {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+if __name__ == "__main__":
+    main_cli(sys.argv[1:])
@@ -1,58 +1,94 @@
-import re
-from typing import Dict
+import time
+from array import array
+from typing import Dict, Iterable, Optional, Sequence, Union
+from card_parser import GROUP_RE, SUITS, ParsedMessage, count_suits, parse_message
 
 class CardCounter:
     # On ne garde que les clés principales normalisées ici
     # Les variantes textes sont gérées dans la logique de comptage
-    SYMBOLS_KEYS = ("♠️", "♥️", "♦️", "♣️")
+    SYMBOLS_KEYS = SUITS
+    # Historique glissant : une case par minute sur 48 h
+    WINDOW_MINUTES = 48 * 60
     
-    def __init__(self):
+    def __init__(self, window_minutes: int = WINDOW_MINUTES):
+        # _TOTAL : période en cours (depuis le dernier bilan automatique)
         self._TOTAL = {s: 0 for s in self.SYMBOLS_KEYS}
+        self.window_minutes = window_minutes
+        self._init_buckets()
+
+    def _init_buckets(self) -> None:
+        """Anneau de cases minute : une array par couleur + minute absolue de chaque case"""
+        size = self.window_minutes
+        self._buckets = tuple(array("l", [0]) * size for _ in self.SYMBOLS_KEYS)
+        self._stamps = array("q", [-1]) * size
 
     def extract_first_group(self, text: str) -> str:
         """Extrait UNIQUEMENT le 1er groupe entre parenthèses"""
-        groups = re.findall(r"\(([^)]*)\)", text)
-        return groups[0] if len(groups) >= 1 else ""
+        m = GROUP_RE.search(text)
+        return m.group(1) if m else ""
 
     def count_symbols(self, group: str) -> Dict[str, int]:
         """
-        Compte les symboles de manière séquentielle pour éviter les doublons.
-        Priorité aux émojis, puis au texte simple.
+        Compte les symboles du groupe. Émoji (♠️) ou texte simple (♠) comptent
+        chacun pour une carte (voir card_parser.count_suits).
         """
-        counts = {s: 0 for s in self.SYMBOLS_KEYS}
-        temp_group = group  # Copie de travail
+        return dict(zip(self.SYMBOLS_KEYS, count_suits(group)))
 
-        # 1. D'abord compter les Émojis complets (ex: ♠️)
-        # On utilise une liste explicite pour l'ordre de traitement
-        emojis = ["♠️", "♥️", "♦️", "♣️"]
-        for emoji in emojis:
-            count = temp_group.count(emoji)
-            counts[emoji] += count
-            # IMPORTANT: On retire l'émoji trouvé pour qu'il ne soit pas 
-            # recompté comme symbole texte simple ensuite
-            if count > 0:
-                temp_group = temp_group.replace(emoji, "")
+    def add(self, text: Union[str, ParsedMessage], at: Optional[float] = None) -> None:
+        """Compte les symboles du 1er groupe uniquement (at : horodatage du message, défaut maintenant)"""
+        parsed = text if isinstance(text, ParsedMessage) else parse_message(text)
+        if not parsed.groups: return
+        self._add_totals(*parsed.first_counts, at=at)
 
-        # 2. Ensuite compter les symboles texte restants (ex: ♠)
-        # Mapping du symbole texte vers la clé émoji
-        text_variants = {"♠": "♠️", "♥": "♥️", "♦": "♦️", "♣": "♣️"}
-        for text_char, target_key in text_variants.items():
-            count = temp_group.count(text_char)
-            if count > 0:
-                counts[target_key] += count
+    def add_many(self, messages: Iterable[Union[str, ParsedMessage]], at: Optional[float] = None) -> int:
+        """
+        Comptage par lot (rattrapage, relecture) : même résultat qu'un appel
+        à add() par message, sans dictionnaire intermédiaire par message.
+        Retourne le nombre de messages ayant un 1er groupe.
+        """
+        search = GROUP_RE.search
+        spades = hearts = diamonds = clubs = n = 0
+        for msg in messages:
+            if msg.__class__ is ParsedMessage:
+                if not msg.groups: continue
+                a, b, c, d = msg.suit_counts[0]
+                spades += a; hearts += b; diamonds += c; clubs += d
+            else:
+                m = search(msg)
+                if m is None: continue
+                group = m.group(1)
+                spades += group.count("♠"); hearts += group.count("♥")
+                diamonds += group.count("♦"); clubs += group.count("♣")
+            n += 1
+        self._add_totals(spades, hearts, diamonds, clubs, at=at)
+        return n
 
-        return counts
+    def add_counts(self, counts: Iterable[Sequence[int]], at: Optional[float] = None) -> int:
+        """Ajoute des comptages déjà calculés (tuples ♠️ ♥️ ♦️ ♣️)"""
+        spades = hearts = diamonds = clubs = n = 0
+        for a, b, c, d in counts:
+            spades += a; hearts += b; diamonds += c; clubs += d
+            n += 1
+        self._add_totals(spades, hearts, diamonds, clubs, at=at)
+        return n
 
-    def add(self, text: str) -> None:
-        """Compte les symboles du 1er groupe uniquement"""
-        first_group = self.extract_first_group(text)
-        if not first_group: return
-        
-        # Utiliser la nouvelle logique de comptage sécurisée
-        counts = self.count_symbols(first_group)
-        
-        for s, c in counts.items():
-            self._TOTAL[s] += c
+    def _add_totals(self, spades: int, hearts: int, diamonds: int, clubs: int, at: Optional[float] = None) -> None:
+        total = self._TOTAL
+        total["♠️"] += spades; total["♥️"] += hearts
+        total["♦️"] += diamonds; total["♣️"] += clubs
+
+        # Case minute de l'anneau (remise à zéro si elle date d'un tour précédent)
+        now = int(time.time() // 60)
+        minute = now if at is None else int(at // 60)
+        if minute <= now - self.window_minutes: return
+        i = minute % self.window_minutes
+        buckets = self._buckets
+        if self._stamps[i] != minute:
+            if self._stamps[i] > minute: return  # case déjà recyclée par une minute plus récente
+            self._stamps[i] = minute
+            for b in buckets: b[i] = 0
+        buckets[0][i] += spades; buckets[1][i] += hearts
+        buckets[2][i] += diamonds; buckets[3][i] += clubs
 
     # ---- rapport SANS reset (instantané) ----
     def build_report(self) -> str:
@@ -71,15 +107,39 @@ class CardCounter:
 
     # ---- bilan + reset (intervalle) ----
     def report_and_reset(self) -> str:
-        total = sum(self._TOTAL.values())
+        """Bilan de la période en cours puis remise à zéro de cette période (les fenêtres glissantes sont conservées)"""
+        msg = self.format_bilan(self._TOTAL)
+        self._TOTAL = {s: 0 for s in self.SYMBOLS_KEYS}
+        return msg
+
+    # ---- bilan sur fenêtre glissante (sans reset) ----
+    def report_window(self, minutes: int, now: Optional[float] = None) -> str:
+        minutes = max(1, min(int(minutes), self.window_minutes))
+        label = f"{minutes // 60} h" if minutes % 60 == 0 else f"{minutes} min"
+        return self.format_bilan(self.window_totals(minutes, now), f"📊 Bilan {label} 📊")
+
+    def window_totals(self, minutes: int, now: Optional[float] = None) -> Dict[str, int]:
+        """Somme des cases minute des `minutes` dernières minutes (O(minutes), sans reset)"""
+        current = int((time.time() if now is None else now) // 60)
+        minutes = max(1, min(int(minutes), self.window_minutes))
+        size = self.window_minutes
+        stamps = self._stamps
+        spades, hearts, diamonds, clubs = self._buckets
+        a = b = c = d = 0
+        for minute in range(current - minutes + 1, current + 1):
+            i = minute % size
+            if stamps[i] == minute:
+                a += spades[i]; b += hearts[i]; c += diamonds[i]; d += clubs[i]
+        return dict(zip(self.SYMBOLS_KEYS, (a, b, c, d)))
+
+    def format_bilan(self, totals: Dict[str, int], title: str = "📊 Bilan 📊") -> str:
+        total = sum(totals.values())
         if total == 0:
-            # Reset même si vide pour garder la cohérence
-            self._TOTAL = {s: 0 for s in self.SYMBOLS_KEYS}
-            return "╔════════════════════╗\n📊 Bilan 📊\n╚════════════════════╝\n\n🔍 Aucune carte comptabilisée"
+            return f"╔════════════════════╗\n{title}\n╚════════════════════╝\n\n🔍 Aucune carte comptabilisée"
         
         lines = [
             "╔════════════════════╗",
-            "📊 Bilan 📊",
+            title,
             "╚════════════════════╝",
             ""
         ]
@@ -93,7 +153,7 @@ class CardCounter:
         }
         
         for s in self.SYMBOLS_KEYS:
-            count = self._TOTAL[s]
+            count = totals[s]
             pct = count * 100 / total
             data = symbols_data[s]
             
@@ -110,10 +170,9 @@ class CardCounter:
         lines.append("━━━━━━━━━━━━━━━━━━━━")
         lines.append(f"📌 Total: {total} carte{'s' if total > 1 else ''}")
         lines.append("━━━━━━━━━━━━━━━━━━━━")
-        
-        # Reset après le rapport
-        self._TOTAL = {s: 0 for s in self.SYMBOLS_KEYS}
         return "\n".join(lines)
 
     def reset(self) -> None:
+        """Remise à zéro complète : période en cours et fenêtres glissantes"""
         self._TOTAL = {s: 0 for s in self.SYMBOLS_KEYS}
+        self._init_buckets()
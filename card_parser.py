@@ -0,0 +1,108 @@
+import re
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Clés normalisées (émojis) et caractère de base de chaque couleur.
+# Un émoji "♠️" est le caractère "♠" suivi du sélecteur U+FE0F : compter le
+# caractère de base compte donc chaque carte une seule fois, émoji ou texte.
+SUITS = ("♠️", "♥️", "♦️", "♣️")
+SUIT_BASES = ("♠", "♥", "♦", "♣")
+
+GROUP_RE = re.compile(r"\(([^)]*)\)")
+GAME_RE  = re.compile(r"#N\s*(\d+)\.?|jeu\s*#?\s*(\d+)", re.I)
+
+# Marqueurs de statut (bits de ParsedMessage.flags)
+PENDING = 1   # ⏰ / 🕐
+CHECK   = 2   # ✅
+SHIELD  = 4   # 🔰
+CROSS   = 8   # ❌
+CIRCLE  = 16  # ⭕
+MARKERS = (("⏰", PENDING), ("🕐", PENDING), ("✅", CHECK), ("🔰", SHIELD), ("❌", CROSS), ("⭕", CIRCLE))
+
+EMPTY_COUNTS = (0, 0, 0, 0)
+
+def count_suits(group: str) -> Tuple[int, int, int, int]:
+    """Nombre de cartes par couleur (ordre de SUITS) dans un groupe"""
+    return (group.count("♠"), group.count("♥"), group.count("♦"), group.count("♣"))
+
+def parse_game_number(text: str) -> Optional[int]:
+    m = GAME_RE.search(text)
+    return int(m.group(1) or m.group(2)) if m else None
+
+class ParsedMessage:
+    """Résultat compact de l'analyse d'un message du canal statistiques"""
+    __slots__ = ("text", "game_number", "groups", "suit_counts", "flags")
+
+    def __init__(self, text: str, game_number: Optional[int], groups: Tuple[str, ...],
+                 suit_counts: Tuple[Tuple[int, int, int, int], ...], flags: int):
+        self.text = text
+        self.game_number = game_number
+        self.groups = groups
+        self.suit_counts = suit_counts
+        self.flags = flags
+
+    @property
+    def is_pending(self) -> bool:
+        return bool(self.flags & PENDING)
+
+    @property
+    def is_finalized(self) -> bool:
+        """Résultat définitif (✅ ou 🔰)"""
+        return bool(self.flags & (CHECK | SHIELD))
+
+    @property
+    def has_result(self) -> bool:
+        """Porte un marqueur de résultat (✅ 🔰 ❌ ⭕)"""
+        return bool(self.flags & (CHECK | SHIELD | CROSS | CIRCLE))
+
+    @property
+    def first_group(self) -> str:
+        return self.groups[0] if self.groups else ""
+
+    @property
+    def first_counts(self) -> Tuple[int, int, int, int]:
+        return self.suit_counts[0] if self.suit_counts else EMPTY_COUNTS
+
+    def card_count(self, index: int) -> int:
+        return sum(self.suit_counts[index]) if index < len(self.suit_counts) else 0
+
+    def __repr__(self):
+        return f"ParsedMessage(game={self.game_number}, groups={self.groups}, flags={self.flags})"
+
+def parse_message(text: str) -> ParsedMessage:
+    """Analyse un message en une passe : numéro de jeu, groupes, comptages, marqueurs"""
+    groups = tuple(GROUP_RE.findall(text))
+    flags = 0
+    for marker, bit in MARKERS:
+        if marker in text:
+            flags |= bit
+    return ParsedMessage(text, parse_game_number(text), groups,
+                         tuple(count_suits(g) for g in groups), flags)
+
+class ParseCache:
+    """Cache LRU (chat_id, message_id) → ParsedMessage ; réanalyse seulement si le texte change"""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chat_id: int, message_id: int, text: str) -> ParsedMessage:
+        key = (chat_id, message_id)
+        parsed = self._items.get(key)
+        if parsed is not None and parsed.text == text:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return parsed
+        self.misses += 1
+        parsed = self._items[key] = parse_message(text)
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return parsed
+
+parse_cache = ParseCache()
+
+def parse_cached(chat_id: int, message_id: int, text: str) -> ParsedMessage:
+    return parse_cache.get(chat_id, message_id, text)
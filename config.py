@@ -19,6 +19,32 @@ DISPLAY_CHANNEL_ID = -1002674389383  # Canal d'affichage configuré
 # Le bot enverra un bilan à chaque heure pile (XX:00)
 AUTO_BILAN_INTERVAL = 60  # 60 minutes = bilans horaires
 
+# Délai minimal entre deux mises à jour du compteur instantané (en secondes)
+# Le bot édite un seul message épinglé au lieu d'en publier un nouveau
+INSTANT_REPORT_INTERVAL = 10
+
+# Messages en attente (⏰) : taille maximale, expiration et sauvegarde dans data/
+PENDING_MAX_SIZE = 5000
+PENDING_TTL_HOURS = 6
+PENDING_PERSIST = True
+
+# File de traitement par route (bornée) : au-delà, les gestionnaires attendent ;
+# saturée à moitié, les mises à jour de l'instantané sont délestées
+ROUTE_QUEUE_SIZE = 1000
+
+# Rattrapage au démarrage : messages du canal source publiés pendant l'arrêt
+BACKFILL_MAX_MESSAGES = 5000
+BACKFILL_BATCH_SIZE = 100
+
+# Prédictions automatiques (planificateur + vérification des résultats)
+# Désactivées par défaut ; activables à chaud avec /predictions on
+AUTO_PREDICTIONS = False
+# Horizon glissant : heures de lancements futurs toujours planifiées
+PREDICTION_HORIZON_HOURS = 12
+
+# Session Telethon persistante (data/<nom>.session) : autorisation et entités réutilisées au redémarrage
+SESSION_NAME = "bot"
+
 # Port du serveur web (pour health checks)
 # Port 10000 pour Render.com, Port 8000 pour Replit
 DEFAULT_PORT = 10000
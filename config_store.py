@@ -0,0 +1,78 @@
+import os, json, asyncio
+from typing import Any, Callable, Dict, List
+
+class ConfigStore:
+    """
+    Configuration unique du bot, chargée une fois puis servie depuis la mémoire.
+    Priorité au chargement : stockage (data/) > anciens fichiers JSON > config.py.
+    Toute modification passe par set(), qui persiste et notifie les abonnés.
+    """
+
+    # Anciens fichiers importés une seule fois : fichier → {clé JSON: clé du store}
+    LEGACY_FILES = {
+        "bot_config.json": {"stat_channel": "stat_channel", "display_channel": "display_channel"},
+        "interval.json": {None: "auto_bilan_interval"},
+    }
+
+    def __init__(self, database, defaults: Dict[str, Any]):
+        self.database = database
+        self.defaults = dict(defaults)
+        self._values: Dict[str, Any] = {}
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self.load()
+
+    def load(self):
+        legacy = self._read_legacy()
+        missing = object()
+        for key, default in self.defaults.items():
+            value = self.database.get_config(key, missing)
+            if value is missing:
+                value = legacy.get(key, default)
+                if key in legacy:
+                    # Migration : la valeur vit désormais dans le stockage
+                    self.database.set_config(key, value)
+                    print(f"✅ Configuration '{key}' migrée depuis l'ancien fichier JSON")
+            self._values[key] = value
+
+    def _read_legacy(self) -> Dict[str, Any]:
+        values = {}
+        for file_name, mapping in self.LEGACY_FILES.items():
+            if not os.path.exists(file_name): continue
+            try:
+                with open(file_name) as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Ancien fichier {file_name} illisible : {e}")
+                continue
+            for json_key, key in mapping.items():
+                if json_key is None:
+                    values[key] = data
+                elif isinstance(data, dict) and data.get(json_key) is not None:
+                    values[key] = data[json_key]
+        return values
+
+    def get(self, key: str, default=None) -> Any:
+        if key not in self._values:
+            # Clé hors des valeurs par défaut (ex. message épinglé d'une route) : lue une fois
+            missing = object()
+            value = self.database.get_config(key, missing)
+            if value is missing: return default
+            self._values[key] = value
+        return self._values[key]
+
+    def set(self, key: str, value: Any):
+        old = self._values.get(key)
+        if old == value and key in self._values: return
+        self._values[key] = value
+        self.database.set_config(key, value)
+        for callback in self._subscribers.get(key, []):
+            try:
+                result = callback(key, value, old)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print(f"❌ Erreur abonné configuration '{key}' : {e}")
+
+    def subscribe(self, key: str, callback: Callable[[str, Any, Any], Any]):
+        """callback(clé, nouvelle valeur, ancienne valeur), synchrone ou coroutine"""
+        self._subscribers.setdefault(key, []).append(callback)
@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from persister import WriteBehindPersister, persister as default_persister
+
+class DedupIndex:
+    """
+    Index anti-doublon en mémoire (ensemble de hash) persisté par un journal
+    en ajout seul. Le journal est compacté en arrière-plan quand il dépasse
+    deux fois la capacité de l'index.
+    """
+
+    def __init__(self, journal_file: Path, max_entries: int = 10000,
+                 persister: Optional[WriteBehindPersister] = None):
+        self.journal_file = Path(journal_file)
+        self.max_entries = max_entries
+        self.persister = persister or default_persister
+        # dict utilisé comme ensemble ordonné : hash → (channel_id, processed_at)
+        self._entries = {}
+        self._journal_lines = 0
+        self._load()
+
+    @staticmethod
+    def message_hash(content: str, channel_id: int) -> str:
+        return hashlib.sha256(f"{channel_id}:{content}".encode()).hexdigest()
+
+    # ---- chargement ----
+    def _load(self):
+        if not self.journal_file.exists(): return
+        try:
+            with open(self.journal_file, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3 or len(parts[0]) != 64: continue  # ligne tronquée (crash)
+                    self._remember(parts[0], parts[1], parts[2])
+                    self._journal_lines += 1
+        except Exception as e:
+            print(f"❌ Erreur chargement {self.journal_file} : {e}")
+
+    def seed(self, entries: Iterable[Tuple[str, int, str]]):
+        """Importe des entrées existantes (ex: ancien message_log.yaml) et réécrit le journal"""
+        for h, channel_id, processed_at in entries:
+            self._remember(h, channel_id, processed_at)
+        self.compact()
+
+    def _remember(self, h: str, channel_id, processed_at: str):
+        self._entries.pop(h, None)
+        self._entries[h] = (channel_id, processed_at)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    # ---- API ----
+    def __contains__(self, h: str) -> bool:
+        return h in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, content: str, channel_id: int) -> bool:
+        return self.message_hash(content, channel_id) in self._entries
+
+    def add(self, content: str, channel_id: int) -> bool:
+        """Ajoute le message à l'index ; retourne False s'il était déjà présent"""
+        return self.add_hash(self.message_hash(content, channel_id), channel_id)
+
+    def add_hash(self, h: str, channel_id: int, processed_at: Optional[str] = None) -> bool:
+        if h in self._entries: return False
+        processed_at = processed_at or datetime.now().isoformat(timespec="seconds")
+        self._remember(h, channel_id, processed_at)
+        self.persister.append(self.journal_file, f"{h}\t{channel_id}\t{processed_at}\n")
+        self._journal_lines += 1
+        if self._journal_lines > 2 * self.max_entries:
+            self.compact()
+        return True
+
+    # ---- compaction ----
+    def compact(self):
+        """
+        Remplace le journal par l'état courant de l'index. La copie des entrées
+        est immédiate ; le formatage et l'écriture se font dans le thread d'écriture.
+        """
+        snapshot = list(self._entries.items())
+        self.persister.write(self.journal_file, lambda: "".join(f"{h}\t{c}\t{t}\n" for h, (c, t) in snapshot))
+        self._journal_lines = len(snapshot)
@@ -0,0 +1,125 @@
+import asyncio, itertools, random
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from telethon import utils
+from telethon.errors import FloodWaitError, MessageIdInvalidError, MessageNotModifiedError
+from telethon.tl.types import InputPeerChannel, PeerChannel
+
+def _chat_id(entity) -> int:
+    """Identifiant du chat, que l'appelant passe un entier ou un InputPeer"""
+    return entity if isinstance(entity, int) else utils.get_peer_id(entity)
+
+class FakeMessage:
+    __slots__ = ("id", "chat_id", "message", "date", "pinned")
+
+    def __init__(self, id: int, chat_id: int, message: str, date: Optional[datetime] = None):
+        self.id = id
+        self.chat_id = chat_id
+        self.message = message
+        self.date = date or datetime.now(timezone.utc)
+        self.pinned = False
+
+class FakeEvent:
+    """Événement minimal (NewMessage / MessageEdited) tel que lu par les gestionnaires de main.py"""
+
+    def __init__(self, client: "FakeTelegramClient", chat_id: int, message: FakeMessage, sender_id: int = 0):
+        self.client = client
+        self.chat_id = chat_id
+        self.message = message
+        self.sender_id = sender_id
+        self.is_group = False
+        self.pattern_match = None
+
+    async def respond(self, text: str, **kwargs):
+        return await self.client.send_message(self.chat_id, text, **kwargs)
+
+class FakeTelegramClient:
+    """
+    Client Telegram en mémoire pour les bancs d'essai : latence simulée
+    (min, max en secondes) et FloodWait injectés avec la probabilité `flood_rate`.
+    """
+
+    def __init__(self, latency: Tuple[float, float] = (0.0, 0.0), flood_rate: float = 0.0,
+                 flood_seconds: int = 1, seed: Optional[int] = None):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.random = random.Random(seed)
+        self.handlers: List[Tuple[Any, Any]] = []
+        self.chats: Dict[int, Dict[int, FakeMessage]] = {}
+        self._ids = itertools.count(1)
+        self.calls: Dict[str, int] = {}
+        self.floods = 0
+
+    # ---- API Telethon utilisée par le bot ----
+    def add_event_handler(self, callback, event=None):
+        self.handlers.append((callback, event))
+
+    async def start(self, **kwargs):
+        return self
+
+    async def get_me(self):
+        return type("User", (), {"id": 0, "username": "fake_bot"})()
+
+    async def get_entity(self, entity):
+        await self._call("get_entity")
+        return type("Channel", (), {"id": int(entity), "title": f"Canal {entity}"})()
+
+    async def get_input_entity(self, entity):
+        await self._call("get_input_entity")
+        real_id, peer_type = utils.resolve_id(int(entity))
+        return InputPeerChannel(real_id, 0) if peer_type is PeerChannel else int(entity)
+
+    async def send_message(self, entity, message: str, **kwargs) -> FakeMessage:
+        await self._call("send_message")
+        chat = self.chats.setdefault(_chat_id(entity), {})
+        msg = FakeMessage(next(self._ids), _chat_id(entity), message)
+        chat[msg.id] = msg
+        return msg
+
+    async def edit_message(self, entity, message, text: str = None, **kwargs) -> FakeMessage:
+        await self._call("edit_message")
+        msg = self.chats.get(_chat_id(entity), {}).get(int(message))
+        if msg is None:
+            raise MessageIdInvalidError(request=None)
+        if msg.message == text:
+            raise MessageNotModifiedError(request=None)
+        msg.message = text
+        return msg
+
+    async def pin_message(self, entity, message, **kwargs):
+        await self._call("pin_message")
+        msg = self.chats.get(_chat_id(entity), {}).get(int(message))
+        if msg is not None:
+            msg.pinned = True
+
+    async def send_file(self, entity, file, **kwargs):
+        return await self.send_message(entity, kwargs.get("caption") or str(file))
+
+    async def get_messages(self, entity, ids=None, **kwargs):
+        chat = self.chats.get(_chat_id(entity), {})
+        return [chat.get(i) for i in ids or []]
+
+    async def iter_messages(self, entity, min_id: int = 0, reverse: bool = False, limit: Optional[int] = None, **kwargs):
+        ids = sorted(i for i in self.chats.get(_chat_id(entity), {}) if i > min_id)
+        for i in (ids if reverse else ids[::-1])[:limit]:
+            yield self.chats[_chat_id(entity)][i]
+
+    async def run_until_disconnected(self):
+        await asyncio.Event().wait()
+
+    # ---- simulation ----
+    async def _call(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        low, high = self.latency
+        if high > 0:
+            await asyncio.sleep(self.random.uniform(low, high))
+        if self.flood_rate and self.random.random() < self.flood_rate:
+            self.floods += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+
+    def event(self, chat_id: int, message_id: int, text: str, sender_id: int = 0) -> FakeEvent:
+        """Construit l'événement d'un message du canal source (nouveau ou édité)"""
+        msg = FakeMessage(message_id, int(chat_id), text)
+        self.chats.setdefault(int(chat_id), {})[message_id] = msg
+        return FakeEvent(self, int(chat_id), msg, sender_id)
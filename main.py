@@ -1,11 +1,26 @@
-import os, asyncio, json, re, time
-from datetime import datetime, timedelta
+import os, asyncio, re, time
 from telethon import TelegramClient, events
 from dotenv import load_dotenv
 from predictor import CardPredictor
+from scheduler import PredictionScheduler
 from yaml_manager import init_database
-from card_counter import CardCounter
 from aiohttp import web
+from persister import persister
+from config_store import ConfigStore
+from card_parser import ParsedMessage, parse_cached
+from outbound import OutboundQueue
+from pending_store import PendingStore
+from storage import DATA_DIR
+from backfill import backfill_channel, refetch_messages
+from session_store import prepare_session
+from packager import artifacts
+from router import DEFAULT_ROUTE, Route, Router
+from profiling import stage_timer, profile_capture
+from metrics import (registry, MESSAGES_RECEIVED, MESSAGES_FINALIZED, MESSAGES_DEDUPLICATED,
+                     MESSAGES_PENDING)
+from itertools import groupby
+from operator import itemgetter
+from typing import Optional
 import config  # Importer la configuration centralisée
 
 load_dotenv()
@@ -18,98 +33,204 @@ ADMIN_ID = int(os.getenv("ADMIN_ID") or 0)
 PORT     = int(os.getenv('PORT', 10000))
 
 # ---------- GLOBALS ----------
-# Utiliser la configuration pré-définie dans config.py
-detected_stat_channel  = config.STAT_CHANNEL_ID
-# Forcer l'utilisation du canal depuis config.py (ignorer la variable d'environnement)
-detected_display_channel = config.DISPLAY_CHANNEL_ID
-CONFIG_FILE   = "bot_config.json"
-INTERVAL_FILE = "interval.json"
-AUTO_BILAN_MIN = 30
-AUTO_TASK      = None
+# Modules embarqués dans les paquets /deploy et /dep (main.py est ajouté à part)
+SOURCE_FILES = ["predictor.py", "yaml_manager.py", "card_counter.py", "scheduler.py", "config.py",
+                "storage.py", "dedup_index.py", "persister.py", "config_store.py", "card_parser.py",
+                "publisher.py", "outbound.py", "pending_store.py",
+                "backfill.py", "router.py", "metrics.py",
+                "profiling.py", "fake_telegram.py", "replay.py",
+                "benchmarks.py", "prediction_index.py", "schedule_journal.py",
+                "session_store.py", "packager.py", "pipeline.py"]
 
 # File d'attente pour messages en attente
-pending_messages = {}  # {message_id: message_text}
+# (bornée, expiration TTL, sauvegardée dans data/ si PENDING_PERSIST)
+pending_messages = PendingStore(max_size=config.PENDING_MAX_SIZE, ttl=config.PENDING_TTL_HOURS * 3600,
+                                path=DATA_DIR / "pending_messages.json" if config.PENDING_PERSIST else None)
 
 database = init_database()
+# Configuration unique : config.py ne fournit plus que les valeurs par défaut
+settings = ConfigStore(database, {
+    "stat_channel": config.STAT_CHANNEL_ID,
+    "display_channel": config.DISPLAY_CHANNEL_ID,
+    "auto_bilan_interval": config.AUTO_BILAN_INTERVAL,
+    "instant_report_interval": config.INSTANT_REPORT_INTERVAL,
+    "instant_message": None,
+    "stat_checkpoints": {},
+    "routes": [],
+    "auto_predictions": config.AUTO_PREDICTIONS,
+})
+# Copies locales tenues à jour par les notifications du store
+detected_stat_channel    = settings.get("stat_channel")
+detected_display_channel = settings.get("display_channel")
+AUTO_BILAN_MIN           = settings.get("auto_bilan_interval")
+
+# Dernier message vu par canal source : point de reprise du rattrapage au démarrage
+checkpoints = dict(settings.get("stat_checkpoints") or {})
+# Ouvert une fois le rattrapage terminé ; les événements en direct attendent jusque-là
+live_ready  = asyncio.Event()
+
 predictor    = CardPredictor()
-card_counter = CardCounter()
-client       = TelegramClient(f"bot_session_{int(time.time())}", API_ID, API_HASH)
+client       = None  # TelegramClient réel (main) ou faux client (replay.py), voir attach_client
+outbound     = OutboundQueue(None)
+
+# Routes : la route principale suit stat_channel/display_channel, les autres viennent de /route_add
+router = Router(outbound, settings, instant_interval=settings.get("instant_report_interval"),
+                queue_size=config.ROUTE_QUEUE_SIZE)
+router.add(DEFAULT_ROUTE, [detected_stat_channel], [detected_display_channel], AUTO_BILAN_MIN)
+for spec in settings.get("routes") or []:
+    try:
+        router.add(spec["name"], spec["sources"], spec["displays"], spec.get("bilan_interval") or AUTO_BILAN_MIN)
+    except (KeyError, ValueError) as ex:
+        print(f"⚠️ Route ignorée {spec} : {ex}")
+# Prédictions automatiques : publiées dans le canal d'affichage, vérifiées sur le canal source
+scheduler    = PredictionScheduler(None, predictor, detected_stat_channel, detected_display_channel, outbound=outbound,
+                                   horizon_hours=config.PREDICTION_HORIZON_HOURS)
+SCHEDULER_TASK = None
+
+# ---------- HANDLERS ----------
+# Enregistrés sur le client par attach_client() et non à l'import :
+# le même module sert au bot réel et au banc de rejeu hors ligne.
+HANDLERS = []
+
+def on(event):
+    def decorator(func):
+        HANDLERS.append((func, event))
+        return func
+    return decorator
+
+def attach_client(new_client):
+    """Branche un client (réel ou factice) : envois, rattrapage et gestionnaires d'événements"""
+    global client
+    client = new_client
+    outbound.client = new_client
+    outbound.peers.clear()
+    scheduler.client = new_client
+    for func, event in HANDLERS:
+        new_client.add_event_handler(func, event)
+    return new_client
 
 # ---------- CONFIG TOOLS ----------
-def load_config():
+def on_channel_change(key, value, old):
     global detected_stat_channel, detected_display_channel
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE) as f:
-            c = json.load(f)
-            detected_stat_channel  = c.get("stat_channel")
-            detected_display_channel = c.get("display_channel", detected_display_channel)
-
-def save_config():
-    with open(CONFIG_FILE, "w") as f:
-        json.dump({"stat_channel": detected_stat_channel, "display_channel": detected_display_channel}, f)
-
-def load_interval():
+    if key == "stat_channel":
+        detected_stat_channel = scheduler.source_channel_id = value
+    else:
+        detected_display_channel = scheduler.target_channel_id = value
+    try:
+        router.add(DEFAULT_ROUTE, [detected_stat_channel], [detected_display_channel], AUTO_BILAN_MIN)
+    except ValueError as ex:
+        print(f"⚠️ Route principale non modifiée : {ex}")
+    # Republier l'instantané (éventuellement dans le nouveau canal)
+    router.get().notify()
+    print(f"🔧 {key} : {old} → {value}")
+
+def on_interval_change(key, value, old):
     global AUTO_BILAN_MIN
-    if os.path.exists(INTERVAL_FILE):
-        with open(INTERVAL_FILE) as f:
-            AUTO_BILAN_MIN = max(1, min(int(json.load(f)), 120))
-
-def save_interval(mins: int):
-    with open(INTERVAL_FILE, "w") as f:
-        json.dump(mins, f)
-
-# ---------- AUTO-BILAN ----------
-async def auto_bilan_loop():
+    AUTO_BILAN_MIN = max(1, min(int(value), 120))
+    route = router.get()
+    route.update(route.sources, route.displays, AUTO_BILAN_MIN)
+    route.restart_bilan()
+
+settings.subscribe("stat_channel", on_channel_change)
+settings.subscribe("display_channel", on_channel_change)
+settings.subscribe("auto_bilan_interval", on_interval_change)
+
+def on_predictions_change(key, value, old):
+    """Démarre / arrête le planificateur de prédictions"""
+    global SCHEDULER_TASK
+    if value and (SCHEDULER_TASK is None or SCHEDULER_TASK.done()):
+        SCHEDULER_TASK = asyncio.ensure_future(scheduler.run_scheduler())
+    elif not value and SCHEDULER_TASK is not None:
+        scheduler.stop_scheduler()
+        SCHEDULER_TASK = None
+
+settings.subscribe("auto_predictions", on_predictions_change)
+
+def note_checkpoint(chat_id: int, message_id: int):
+    key = str(chat_id)
+    if message_id > checkpoints.get(key, 0):
+        checkpoints[key] = message_id
+
+def save_state():
+    """Sauvegarde des états gardés en mémoire (messages en attente, points de reprise)"""
+    pending_messages.save()
+    settings.set("stat_checkpoints", dict(checkpoints))
+
+async def maintenance_loop():
+    """Expiration des messages en attente et sauvegarde périodique"""
     while True:
-        # Calculer le temps jusqu'à la prochaine heure pile (minutes 00)
-        from datetime import datetime
-        now = datetime.now()
-        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-        sleep_seconds = (next_hour - now).total_seconds()
-
-        await asyncio.sleep(sleep_seconds)
-        if detected_display_channel:
-            msg = card_counter.report_and_reset()  # envoie + reset
-            await client.send_message(detected_display_channel, msg)
-            print(f"📊 Bilan horaire envoyé à {next_hour.strftime('%H:%M')}")
-
-def restart_auto_bilan():
-    global AUTO_TASK
-    if AUTO_TASK: AUTO_TASK.cancel()
-    AUTO_TASK = asyncio.create_task(auto_bilan_loop())
+        await asyncio.sleep(60)
+        expired = pending_messages.expire()
+        if expired:
+            print(f"🧹 {expired} message(s) en attente expiré(s) — {pending_messages.stats()}")
+        save_state()
 
 # ---------- COMMANDS ----------
-@client.on(events.NewMessage(pattern="/start"))
+@on(events.NewMessage(pattern="/start"))
 async def start(e):
     await e.respond("🎯 Bot **Compteur de cartes** prêt !\nDéveloppé par Sossou Kouamé Appolinaire")
 
-@client.on(events.NewMessage(pattern="/status"))
+@on(events.NewMessage(pattern="/status"))
 async def status(e):
     if e.sender_id != ADMIN_ID: return
-    load_config()
-    await e.respond(f"Stat canal : {detected_stat_channel}\nAffichage canal : {detected_display_channel}\nIntervalle : {AUTO_BILAN_MIN} min")
+    p = pending_messages.stats()
+    await e.respond(f"Stat canal : {detected_stat_channel}\nAffichage canal : {detected_display_channel}\nIntervalle : {AUTO_BILAN_MIN} min\n"
+                    f"En attente : {p['size']} (finalisés {p['promotions']}, expirés {p['evicted_ttl']}, évincés {p['evicted_size']})\n"
+                    f"Routes : {len(router.routes)} (/routes pour le détail)")
+
+@on(events.NewMessage(pattern="/routes"))
+async def routes_list(e):
+    if e.sender_id != ADMIN_ID: return
+    lines = ["🔀 Routes"]
+    for r in router.routes.values():
+        lines.append(f"• {r.name} : {r.sources} → {r.displays} | bilan {r.bilan_interval} min | "
+                     f"traités {r.processed}, file {r.depth()}/{r.pipeline.maxsize}, instantanés délestés {r.pipeline.shed}")
+    await e.respond("\n".join(lines))
+
+@on(events.NewMessage(pattern=r"/route_add (\S+) (\S+) (\S+)(?: (\d+))?"))
+async def route_add(e):
+    if e.sender_id != ADMIN_ID or e.is_group: return
+    name, sources, displays, interval = e.pattern_match.groups()
+    if name == DEFAULT_ROUTE:
+        await e.respond("⚠️ La route principale se configure avec /set_stat et /set_display")
+        return
+    try:
+        route = router.add(name, [int(x) for x in sources.split(",")], [int(x) for x in displays.split(",")],
+                           int(interval) if interval else AUTO_BILAN_MIN)
+    except ValueError as ex:
+        await e.respond(f"❌ Route refusée : {ex}")
+        return
+    route.restart_bilan()
+    settings.set("routes", router.specs())
+    await e.respond(f"✅ Route {name} : {route.sources} → {route.displays}")
+
+@on(events.NewMessage(pattern=r"/route_del (\S+)"))
+async def route_del(e):
+    if e.sender_id != ADMIN_ID or e.is_group: return
+    name = e.pattern_match.group(1)
+    if name == DEFAULT_ROUTE or not router.remove(name):
+        await e.respond(f"❌ Route inconnue ou non supprimable : {name}")
+        return
+    settings.set("routes", router.specs())
+    await e.respond(f"🗑️ Route {name} supprimée")
 
-@client.on(events.NewMessage(pattern=r"/set_stat (-?\d+)"))
+@on(events.NewMessage(pattern=r"/set_stat (-?\d+)"))
 async def set_stat(e):
     if e.sender_id != ADMIN_ID or e.is_group: return
-    global detected_stat_channel
-    detected_stat_channel = int(e.pattern_match.group(1))
-    save_config()
+    settings.set("stat_channel", int(e.pattern_match.group(1)))
     await e.respond("✅ Canal statistiques enregistré.")
 
-@client.on(events.NewMessage(pattern=r"/set_display (-?\d+)"))
+@on(events.NewMessage(pattern=r"/set_display (-?\d+)"))
 async def set_display(e):
     if e.sender_id != ADMIN_ID or e.is_group: return
-    global detected_display_channel
     channel_id = int(e.pattern_match.group(1))
     # Ajouter -100 si manquant pour les canaux Telegram
     if channel_id > 0 and channel_id > 1000000000:
         channel_id = -1000000000000 - channel_id
-    detected_display_channel = channel_id
-    save_config()
+    settings.set("display_channel", channel_id)
     await e.respond(f"✅ Canal d'affichage enregistré : {channel_id}")
 
-@client.on(events.NewMessage(pattern=r"/intervalle"))
+@on(events.NewMessage(pattern=r"/intervalle"))
 async def set_interval(e):
     if e.sender_id != ADMIN_ID: return
     try:
@@ -118,610 +239,252 @@ async def set_interval(e):
     except (ValueError, IndexError):
         await e.respond("Usage : `/intervalle 5` (1-120 min)")
         return
-    save_interval(mins)
-    global AUTO_BILAN_MIN
-    AUTO_BILAN_MIN = mins
-    restart_auto_bilan()
+    settings.set("auto_bilan_interval", mins)
     await e.respond(f"✅ Bilan automatique toutes les {mins} min")
 
-@client.on(events.NewMessage(pattern="/bilan"))
+@on(events.NewMessage(pattern="/bilan"))
 async def bilan(e):
     if e.sender_id != ADMIN_ID: return
-    msg = card_counter.report_and_reset()
-    await e.respond(msg)
+    # /bilan [15 | 90m | 3h] [route] : fenêtre glissante, sans toucher au bilan automatique
+    args = e.message.message.split()[1:]
+    arg = (args or [f"{AUTO_BILAN_MIN}m"])[0].lower()
+    route = router.get(args[1] if len(args) > 1 else None)
+    try:
+        minutes = int(arg[:-1]) * 60 if arg.endswith("h") else int(arg.rstrip("m"))
+    except ValueError:
+        await e.respond("Usage : `/bilan`, `/bilan 15`, `/bilan 3h [route]` (max 48h)")
+        return
+    if route is None:
+        await e.respond("❌ Route inconnue (voir /routes)")
+        return
+    await e.respond(route.counter.report_window(minutes))
 
-@client.on(events.NewMessage(pattern="/reset"))
+@on(events.NewMessage(pattern="/reset"))
 async def reset(e):
     if e.sender_id != ADMIN_ID: return
-    card_counter.reset()
-    await e.respond("✅ Compteur remis à zéro.")
+    args = e.message.message.split()[1:]
+    route = router.get(args[0] if args else None)
+    if route is None:
+        await e.respond("❌ Route inconnue (voir /routes)")
+        return
+    route.counter.reset()
+    await e.respond(f"✅ Compteur remis à zéro ({route.name}).")
 
-@client.on(events.NewMessage(pattern="/deploy"))
-async def deploy(e):
+@on(events.NewMessage(pattern=r"/predictions"))
+async def predictions_cmd(e):
     if e.sender_id != ADMIN_ID: return
-    import zipfile
-    zip_name = "joueu2.zip"
-
-    # Nettoyer tous les anciens fichiers ZIP
-    import glob
-    for old_zip in glob.glob("*.zip"):
-        try:
-            os.remove(old_zip)
-            print(f"🗑️ Ancien fichier supprimé: {old_zip}")
-        except:
-            pass
-
+    # /predictions [on | off]
+    args = e.message.message.split()[1:]
+    if args and args[0] in ("on", "off"):
+        settings.set("auto_predictions", args[0] == "on")
+    st = scheduler.get_schedule_status()
+    state = "activées" if settings.get("auto_predictions") else "désactivées"
+    await e.respond(f"🔮 Prédictions automatiques {state}\n"
+                    + ("\n".join(f"{k} : {v}" for k, v in st.items()) if "error" not in st else st["error"])
+                    + f"\nEn attente de résultat : {len(scheduler.index)}")
+
+@on(events.NewMessage(pattern="/profile"))
+async def profile(e):
+    if e.sender_id != ADMIN_ID: return
+    # /profile | /profile cpu|mem [secondes] | /profile stop | /profile reset
+    args = e.message.message.split()[1:]
+    if not args:
+        state = f"\n🔬 Capture {profile_capture.kind} en cours" if profile_capture.running else ""
+        await e.respond(stage_timer.report() + state)
+        return
+    if args[0] == "reset":
+        stage_timer.reset()
+        await e.respond("✅ Mesures remises à zéro")
+        return
+    if args[0] == "stop":
+        await e.respond("⏹️ Capture arrêtée" if profile_capture.stop() else "ℹ️ Aucune capture en cours")
+        return
     try:
-        with zipfile.ZipFile(zip_name, "w", zipfile.ZIP_DEFLATED) as z:
-            # main.py - Version optimisée avec PORT=10000 pour Replit
-            main_render_content = open("main.py", "r", encoding="utf-8").read()
-            # Remplacer PORT = 8000 par PORT = 10000 et mettre à jour config
-            main_render_content = main_render_content.replace(
-                "PORT     = int(os.getenv('PORT', 10000))",
-                "PORT     = int(os.getenv('PORT', 10000))"
-            )
-            z.writestr("main.py", main_render_content)
-
-            # Fichiers Python - Tous vérifiés et corrigés
-            for f in ["predictor.py", "yaml_manager.py", "card_counter.py", "scheduler.py", "config.py"]:
-                if os.path.exists(f):
-                    z.write(f)
-
-            # runtime.txt - Python 3.11.10 OBLIGATOIRE pour Telethon
-            z.writestr("runtime.txt", "python-3.11.10")
-
-            # requirements.txt - Versions testées et compatibles
-            requirements = """telethon==1.35.0
-aiohttp==3.9.5
-PyYAML==6.0.1
-python-dotenv==1.0.1
-"""
-            z.writestr("requirements.txt", requirements)
-
-            # render.yaml - Configuration optimale Render.com
-            render_config = """services:
-  - type: web
-    name: telegram-card-counter-bot
-    env: python
-    runtime: python-3.11.10
-    buildCommand: pip install -r requirements.txt
-    startCommand: python main.py
-    envVars:
-      - key: PORT
-        value: 10000
-      - key: API_ID
-        sync: false
-      - key: API_HASH
-        sync: false
-      - key: BOT_TOKEN
-        sync: false
-      - key: ADMIN_ID
-        sync: false
-      - key: DISPLAY_CHANNEL
-        sync: false
-"""
-            z.writestr("render.yaml", render_config)
-
-            # .env.example - Template variables d'environnement
-            env_example = """API_ID=your_api_id
-API_HASH=your_api_hash
-BOT_TOKEN=your_bot_token
-ADMIN_ID=your_admin_id
-DISPLAY_CHANNEL=-1003216148681
-PORT=10000
-"""
-            z.writestr(".env.example", env_example)
-
-            # .gitignore - Pour éviter de commit les fichiers sensibles
-            gitignore = """# Telegram sessions
-*.session
-*.session-journal
-
-# Environment
-.env
-.env.local
-
-# Python
-__pycache__/
-*.py[cod]
-*$py.class
-*.so
-.Python
-
-# Data
-data/
-*.json
-*.yaml
-*.yml
-
-# IDE
-.vscode/
-.idea/
-
-# Logs
-*.log
-
-# OS
-.DS_Store
-Thumbs.db
-"""
-            z.writestr(".gitignore", gitcode)
-
-            # README.md - Documentation complète
-            readme = """# jou34 - Compteur de Cartes Telegram
-
-## 🎯 Fonctionnalité Principale
-Ce bot compte **UNIQUEMENT le 1er groupe** de cartes entre parenthèses.
-
-**Exemple:**
-- Message: `(♠️♥️♦️♣️) - (A♠️2♥️)` → Compte seulement `♠️♥️♦️♣️`
-- Le deuxième groupe `(A♠️2♥️)` est complètement ignoré
-
-## ⚙️ Caractéristiques
-✅ Comptage instantané (format simple avec émojis)
-✅ Bilan horaire automatique (format décoré avec barres de progression)
-✅ Envoi automatique chaque heure pile (10:00, 11:00, 12:00, etc.)
-✅ Anti-doublon avec hash SHA256
-✅ Gestion messages en attente (⏰) et finalisés (✅/🔰)
-✅ Stockage YAML (sans base de données)
-✅ Health check endpoint pour monitoring
-✅ **Configuration canaux pré-configurée** dans config.py
-
-## 🚀 Déploiement sur Render.com
-
-### Prérequis
-- Compte Render.com (gratuit)
-- Telegram API credentials (my.telegram.org)
-- Bot Token (@BotFather)
-
-### Étapes de déploiement
-
-1. **Créer un Web Service sur Render.com**
-   - Aller sur https://render.com
-   - Cliquer sur "New +" → "Web Service"
-   - Connecter votre repo GitHub ou uploader le code
-
-2. **Configuration du service**
-   - Name: `telegram-card-counter-bot`
-   - Environment: `Python 3`
-   - Build Command: `pip install -r requirements.txt`
-   - Start Command: `python main.py`
-
-3. **Configuration des canaux** (IMPORTANT - Avant déploiement)
-   - Ouvrir `config.py`
-   - Modifier `STAT_CHANNEL_ID` avec l'ID de votre canal source
-   - Modifier `DISPLAY_CHANNEL_ID` avec l'ID de votre canal d'affichage
-   - Les canaux sont pré-configurés et persistants
-
-4. **Variables d'environnement** (dans l'onglet Environment)
-   ```
-   API_ID=votre_api_id
-   API_HASH=votre_api_hash
-   BOT_TOKEN=votre_bot_token
-   ADMIN_ID=votre_telegram_user_id
-   PORT=10000
-   ```
-   Note: DISPLAY_CHANNEL est optionnel, la valeur de config.py sera utilisée par défaut
-
-5. **Déployer**
-   - Cliquer sur "Create Web Service"
-   - Attendre la fin du déploiement (5-10 minutes)
-   - Vérifier les logs pour confirmer: "Bot connecté"
-
-## 📋 Commandes du Bot
-
-- `/start` - Démarrer le bot
-- `/status` - Voir la configuration et l'état
-- `/set_stat [id]` - Configurer le canal source
-- `/set_display [id]` - Configurer le canal d'affichage
-- `/bilan` - Rapport immédiat et reset manuel
-- `/reset` - Réinitialiser le compteur
-
-## 📊 Fonctionnement
-
-### Messages en attente
-- Messages avec ⏰ → Mis en file d'attente
-- À l'édition vers ✅ ou 🔰 → Traitement automatique
-
-### Comptage
-- **Instant** : Format simple envoyé immédiatement
-  ```
-  📈 Compteur instantané
-  ♠️ : 5  (25.0 %)
-  ♥️ : 8  (40.0 %)
-  ♦️ : 4  (20.0 %)
-  ♣️ : 3  (15.0 %)
-  ```
-
-- **Bilan horaire** : Format décoré avec reset automatique
-  ```
-  ╔════════════════════╗
-  📊 Bilan 📊
-  ╚════════════════════╝
-
-  🖤 ♠️ PIQUE
-  ├─ Compteur: 5 cartes
-  ├─ Pourcentage: 25.0%
-  └─ ⬛⬛⬜⬜⬜⬜⬜⬜⬜⬜
-  ```
-
-## 🔧 Architecture Technique
-
-- **Port**: 10000 (obligatoire pour Render.com)
-- **Python**: 3.11.10 (requis pour Telethon)
-- **Stockage**: YAML (dossier `data/`)
-- **Health check**: `/health` endpoint
-
-## ⚠️ Important
-
-### Version Python
-**Python 3.11.10 est OBLIGATOIRE**
-- ❌ Python 3.13+ causera des erreurs avec Telethon
-- ✅ `runtime.txt` contient `python-3.11.10`
-
-### Port
-Le port 10000 est **pré-configuré** et **obligatoire** pour Render.com
-
-### Permissions Telegram
-Le bot doit être:
-- Membre du canal source (pour lire les messages)
-- Membre du canal d'affichage (pour envoyer les rapports)
-
-## 📈 Monitoring
-
-- **Logs**: Dashboard Render.com en temps réel
-- **Health check**: `https://votre-app.onrender.com/health`
-- **Status**: Console output avec timestamps détaillés
-
-## 🐛 Résolution de problèmes
-
-### "File .../asyncio/runners.py" error
-- ❌ Cause: Python 3.13 incompatible
-- ✅ Solution: Vérifier que `runtime.txt` contient `python-3.11.10`
-
-### Build Failed
-- Vérifier que toutes les variables d'environnement sont définies
-- S'assurer que `render.yaml` spécifie `runtime: python-3.11.10`
-
-### Bot ne reçoit pas les messages
-- Vérifier que le bot est membre du canal avec `/set_stat [id]`
-- Confirmer l'ID du canal (format: `-100xxxxxxxxxx`)
-
-## 📦 Fichiers Inclus
-
-- `main.py` - Application principale (PORT=10000)
-- `config.py` - **Configuration centralisée des canaux (PRÉ-CONFIGURÉ)**
-- `card_counter.py` - Logique de comptage
-- `predictor.py` - Système de prédictions
-- `yaml_manager.py` - Gestion YAML
-- `scheduler.py` - Planification
-- `requirements.txt` - Dépendances
-- `runtime.txt` - Python 3.11.10
-- `render.yaml` - Config Render.com
-- `.env.example` - Template variables
-- `.gitignore` - Fichiers à ignorer
-
-🎯 **jou34** - Prêt pour déploiement Replit!
-
-## 📋 Configuration Canaux Pré-Configurée
-- **Canal Source**: -1002682552255 (lecture des messages de cartes)
-- **Canal Affichage**: -1002674389383 (envoi des rapports)
-- Ces canaux sont déjà configurés dans `config.py`
-- Modifiez `config.py` avant déploiement si nécessaire
-- **Comptage**: 1er groupe uniquement
-"""
-            z.writestr("README.md", readme)
-
-        await e.respond("📦 joueu2.zip créé avec succès!\n✅ Port 10000 Replit\n✅ Python 3.11.10\n✅ Compte le 1er groupe uniquement\n✅ Canal: -1002674389383\n✅ Tous fichiers optimisés")
-        await client.send_file(e.chat_id, zip_name, caption="🚀 joueu2.zip - Déploiement complet (1er groupe)")
-
-        # Nettoyer le fichier ZIP après envoi
-        if os.path.exists(zip_name):
-            os.remove(zip_name)
+        seconds = max(1, min(int(args[1]) if len(args) > 1 else 30, 600))
+        profile_capture.start(args[0], seconds, lambda text: e.respond(text[:4000]))
+    except (ValueError, RuntimeError) as ex:
+        await e.respond(f"❌ {ex}\nUsage : `/profile`, `/profile cpu 30`, `/profile mem 30`, `/profile stop`, `/profile reset`")
+        return
+    await e.respond(f"🔬 Capture {args[0]} démarrée pour {seconds}s")
 
+@on(events.NewMessage(pattern="/deploy"))
+async def deploy(e):
+    if e.sender_id != ADMIN_ID: return
+    try:
+        # Construction dans un thread ; archive reprise du cache si les sources n'ont pas changé
+        path, cached = await artifacts.build("deploy", SOURCE_FILES)
+        note = "\n♻️ Sources inchangées : archive reprise du cache" if cached else ""
+        await e.respond("📦 joueu2.zip créé avec succès!\n✅ Port 10000 Replit\n✅ Python 3.11.10\n✅ Compte le 1er groupe uniquement\n✅ Canal: -1002674389383\n✅ Tous fichiers optimisés" + note)
+        await client.send_file(e.chat_id, str(path), caption="🚀 joueu2.zip - Déploiement complet (1er groupe)")
     except Exception as ex:
         await e.respond(f"❌ Erreur: {ex}")
 
-@client.on(events.NewMessage(pattern="/dep"))
+@on(events.NewMessage(pattern=r"/dep\b"))
 async def dep_render(e):
     if e.sender_id != ADMIN_ID: return
-    import zipfile
-
-    zip_name = "render10k.zip"
-
     try:
-        with zipfile.ZipFile(zip_name, "w", zipfile.ZIP_DEFLATED) as z:
-            # main.py - Version modifiée avec PORT=10000 pour Render.com
-            main_render_content = open("main.py", "r", encoding="utf-8").read()
-            # Remplacer PORT = 8000 par PORT = 10000 pour Render.com
-            main_render_content = main_render_content.replace(
-                "PORT     = int(os.getenv('PORT', 8000))",
-                "PORT     = int(os.getenv('PORT', 10000))"
-            )
-            z.writestr("main.py", main_render_content)
-
-            # Fichiers Python principaux (sauf main.py déjà traité)
-            for f in ["predictor.py", "yaml_manager.py", "card_counter.py", "scheduler.py"]:
-                if os.path.exists(f):
-                    z.write(f)
-
-            # runtime.txt - IMPORTANT: Python 3.11 pour compatibilité Telethon
-            runtime_content = "python-3.11.10"
-            z.writestr("runtime.txt", runtime_content)
-
-            # requirements.txt - Versions testées et compatibles
-            requirements_content = """telethon==1.35.0
-aiohttp==3.9.5
-PyYAML==6.0.1
-python-dotenv==1.0.1
-"""
-            z.writestr("requirements.txt", requirements_content)
-
-            # Fichiers de configuration
-            if os.path.exists(".gitignore"):
-                z.write(".gitignore")
-
-            # Configuration render.yaml pour Render.com
-            render_yaml = """services:
-  - type: web
-    name: telegram-card-counter-bot
-    env: python
-    runtime: python-3.11.10
-    buildCommand: pip install -r requirements.txt
-    startCommand: python main.py
-    envVars:
-      - key: PORT
-        value: 10000
-      - key: API_ID
-        sync: false
-      - key: API_HASH
-        sync: false
-      - key: BOT_TOKEN
-        sync: false
-      - key: ADMIN_ID
-        sync: false
-      - key: DISPLAY_CHANNEL
-        sync: false
-"""
-            z.writestr("render.yaml", render_yaml)
-
-            # Fichier .env.example pour Render.com
-            env_example = """API_ID=your_api_id
-API_HASH=your_api_hash
-BOT_TOKEN=your_bot_token
-ADMIN_ID=your_admin_id
-DISPLAY_CHANNEL=0
-PORT=10000
-"""
-            z.writestr(".env.example", env_example)
-
-            # README de déploiement Render.com
-            readme = """# Package render10k - Déploiement Render.com (Port 10000)
-
-## ⚠️ IMPORTANT - Version Python
-**Ce bot nécessite Python 3.11.10** pour compatibilité avec Telethon.
-- ❌ Python 3.13+ causera des erreurs asyncio
-- ✅ Python 3.11.10 est préconfiguré dans runtime.txt
-
-## 🎯 Fonctionnalité du comptage
-**Le bot compte UNIQUEMENT le 2ème groupe entre parenthèses**
-- Message exemple: `(groupe1)(♠️♥️♦️♣️)` → Compte seulement `♠️♥️♦️♣️`
-- Le premier groupe est complètement ignoré
-
-## 🚀 Instructions de déploiement sur Render.com:
-
-1. **Créer un compte Render.com**
-   - Aller sur https://render.com
-   - S'inscrire ou se connecter avec GitHub
-
-2. **Créer un nouveau Web Service**
-   - Cliquer sur "New +" → "Web Service"
-   - Connecter votre repository GitHub ou uploader le code
-
-3. **Configuration du service**
-   - **Name**: telegram-card-counter-bot
-   - **Environment**: Python 3
-   - **Build Command**: `pip install -r requirements.txt`
-   - **Start Command**: `python main.py`
-   - **Port**: 10000 (automatique via render.yaml)
-
-4. **Configurer les variables d'environnement**
-   Dans l'onglet "Environment", ajouter:
-   - `API_ID`: Votre Telegram API ID (my.telegram.org)
-   - `API_HASH`: Votre Telegram API Hash
-   - `BOT_TOKEN`: Token du bot (@BotFather)
-   - `ADMIN_ID`: Votre Telegram User ID
-   - `DISPLAY_CHANNEL`: ID du canal d'affichage (optionnel)
-   - `PORT`: 10000 (déjà configuré)
-
-5. **Déployer**
-   - Cliquer sur "Create Web Service"
-   - Le déploiement démarre automatiquement
-   - Vérifier les logs pour confirmer la connexion
-
-## 📋 Caractéristiques render10k:
-✅ **Comptage 2ème groupe UNIQUEMENT**: Ignore le 1er groupe, compte seulement le 2ème
-✅ **Port 10000**: Configuration Render.com optimisée
-✅ **Base YAML**: Stockage sans PostgreSQL
-✅ **Gestion file d'attente**: Messages ⏰ → ✅/🔰
-✅ **Anti-doublon**: Hash SHA256 pour éviter le double comptage
-✅ **Rapports automatiques**: Intervalle configurable
-✅ **Prédictions**: Système de prédictions de cartes
-✅ **Health Check**: Endpoint /health pour monitoring
-
-## 🔧 Commandes disponibles:
-- `/status` - État complet du système
-- `/set_stat [id]` - Configurer canal source
-- `/set_display [id]` - Configurer canal affichage
-- `/intervalle [min]` - Intervalle rapports (1-120 min)
-- `/bilan` - Rapport immédiat et reset
-- `/reset` - Réinitialiser compteur
-- `/deploy` - Package render_deploy.zip
-- `/dep` - Package de2000.zip (Render.com optimisé)
-
-## 📊 Architecture:
-- **main.py**: Application principale avec port 10000
-- **card_counter.py**: Logique de comptage de cartes
-- **predictor.py**: Système de prédictions
-- **yaml_manager.py**: Gestion données YAML
-- **scheduler.py**: Planification automatique
-- **render.yaml**: Configuration déploiement Render.com
-- **runtime.txt**: Python 3.11.10 (OBLIGATOIRE)
-- **requirements.txt**: Dépendances testées et compatibles
-
-## 🌐 Endpoints:
-- `GET /health`: Health check (retourne "Bot OK")
-- `GET /`: Root endpoint (retourne "Bot OK")
-
-## 🗄️ Stockage YAML:
-- `data/bot_config.yaml`: Configuration persistante
-- `data/predictions.yaml`: Historique prédictions
-- `data/auto_predictions.yaml`: Planification auto
-- `data/message_log.yaml`: Anti-doublon messages
-- `bot_config.json`: Backup configuration
-- `interval.json`: Intervalle rapports
-
-## ⚙️ Fonctionnement:
-1. **Messages en attente (⏰)**: Mis en file d'attente
-2. **Messages édités**: Détection ⏰ → ✅/🔰
-3. **Messages finalisés (✅/🔰)**: Comptage immédiat du 2ème groupe
-4. **Comptage 2ème groupe**: Le bot ignore le 1er groupe (X)(Y) et compte seulement Y
-5. **Anti-doublon**: Hash SHA256 + YAML log
-6. **Rapports**: Instantanés + périodiques configurables
-
-## ⚠️ Important:
-- Le dossier `data/` est créé automatiquement
-- Les sessions Telegram sont générées au démarrage
-- Configuration sauvegardée en YAML + JSON
-- Port 10000 OBLIGATOIRE pour Render.com
-- Variables d'environnement via dashboard Render.com
-
-## 🔧 Résolution des problèmes courants:
-
-### Erreur "File .../asyncio/runners.py"
-- ❌ Cause: Python 3.13 incompatible avec Telethon
-- ✅ Solution: runtime.txt contient python-3.11.10
-
-### Build Failed sur Render.com
-- Vérifier que runtime.txt existe et contient python-3.11.10
-- Vérifier que render.yaml spécifie runtime: python-3.11.10
-- S'assurer que toutes les variables d'environnement sont définies
-
-## 🚀 Déploiement rapide:
-```bash
-# 1. Décompresser render10k.zip
-unzip render10k.zip
-
-# 2. Upload sur Render.com ou GitHub
-git init
-git add .
-git commit -m "Initial commit"
-git push origin main
-
-# 3. Connecter sur Render.com et déployer
-# Les variables sont dans .env.example
-```
-
-## 📈 Monitoring:
-- Logs en temps réel dans dashboard Render.com
-- Health check automatique: `https://your-app.onrender.com/health`
-- Console output détaillé avec timestamps
-
-🎯 Package render10k prêt pour déploiement Render.com!
-✅ Python 3.11.10 + Port 10000 + Configuration complète
-"""
-            z.writestr("README_RENDER.md", readme)
-
-        await e.respond("📦 Package render10k.zip créé avec succès!\n✅ Python 3.11.10 + Port 10000\n✅ Optimisé pour Render.com\n🔧 Tous les fichiers corrigés et prêts au déploiement")
-        await client.send_file(e.chat_id, zip_name, caption="🚀 render10k.zip - Render.com (Python 3.11 + Port 10000)")
-
-        # Nettoyer le fichier ZIP après envoi
-        if os.path.exists(zip_name):
-            os.remove(zip_name)
-
+        path, cached = await artifacts.build("render", SOURCE_FILES)
+        note = "\n♻️ Sources inchangées : archive reprise du cache" if cached else ""
+        await e.respond("📦 Package render10k.zip créé avec succès!\n✅ Python 3.11.10 + Port 10000\n✅ Optimisé pour Render.com\n🔧 Tous les fichiers corrigés et prêts au déploiement" + note)
+        await client.send_file(e.chat_id, str(path), caption="🚀 render10k.zip - Render.com (Python 3.11 + Port 10000)")
     except Exception as ex:
         await e.respond(f"❌ Erreur lors de la création du package: {ex}")
 
 # ---------- MESSAGE HANDLER ----------
-@client.on(events.NewMessage())
+@on(events.NewMessage())
 async def handle_new(e):
-    if e.chat_id != detected_stat_channel: return
+    route = router.route_for(e.chat_id)
+    if route is None: return
+    received_at = time.monotonic()
+    MESSAGES_RECEIVED.inc(1, "new")
+    if not live_ready.is_set(): await live_ready.wait()
+    started = time.perf_counter()
+    note_checkpoint(e.chat_id, e.message.id)
     txt = e.message.message or ""
+    parsed = parse_cached(e.chat_id, e.message.id, txt)
+    stage_timer.lap("parse", started)
 
     # Messages en attente (⏰) → Mise en file d'attente
-    if "⏰" in txt or "🕐" in txt:
-        pending_messages[e.message.id] = txt
+    if parsed.is_pending:
+        pending_messages.put((e.chat_id, e.message.id), txt)
+        MESSAGES_PENDING.inc()
         print(f"⏰ Message mis en attente (ID: {e.message.id}): {txt[:50]}...")
-        return
-
-    # Messages finalisés (✅ ou 🔰) → Traitement immédiat
-    if "✅" in txt or "🔰" in txt:
-        await process_finalized_message(txt, e.chat_id)
-    else:
+    elif not parsed.is_finalized:
         print(f"⏭️ Message non finalisé ignoré : {txt[:50]}...")
+    stage_timer.lap("handle_new", started)
+
+    # Messages finalisés (✅ ou 🔰) → Traitement immédiat ; l'attente d'une place dans la file est mesurée à part
+    if parsed.is_finalized and not parsed.is_pending:
+        t = time.perf_counter()
+        await route.submit(process_finalized_message, txt, e.chat_id, parsed, route, received_at=received_at)
+        stage_timer.lap("submit_wait", t)
 
-@client.on(events.MessageEdited())
+@on(events.MessageEdited())
 async def handle_edited(e):
-    if e.chat_id != detected_stat_channel: return
+    route = router.route_for(e.chat_id)
+    if route is None: return
+    received_at = time.monotonic()
+    MESSAGES_RECEIVED.inc(1, "edited")
+    if not live_ready.is_set(): await live_ready.wait()
+    started = time.perf_counter()
+    waited = 0.0
     txt = e.message.message or ""
 
     # Vérifier si le message était en attente
-    if e.message.id in pending_messages:
+    key = (e.chat_id, e.message.id)
+    if key in pending_messages:
+        parsed = parse_cached(e.chat_id, e.message.id, txt)
+        stage_timer.lap("parse", started)
         # Le message a été édité et n'est plus en attente
-        if "⏰" not in txt and "🕐" not in txt:
+        if not parsed.is_pending:
             # Message finalisé (✅ ou 🔰)
-            if "✅" in txt or "🔰" in txt:
+            if parsed.is_finalized:
                 print(f"✅ Message finalisé (ID: {e.message.id}): {txt[:50]}...")
                 # Retirer de la file d'attente
-                del pending_messages[e.message.id]
-                # Traiter le message finalisé
-                await process_finalized_message(txt, e.chat_id)
+                pending_messages.pop(key, promoted=True)
+                # Traiter le message finalisé (file de la route) ; l'attente d'une place est mesurée à part
+                t = time.perf_counter()
+                await route.submit(process_finalized_message, txt, e.chat_id, parsed, route, received_at=received_at)
+                waited = stage_timer.lap("submit_wait", t) - t
             else:
                 # Message édité mais pas finalisé
                 print(f"⚠️ Message édité mais non finalisé (ID: {e.message.id}): {txt[:50]}...")
-                del pending_messages[e.message.id]
+                pending_messages.pop(key)
         else:
             # Toujours en attente, mettre à jour le texte
-            pending_messages[e.message.id] = txt
+            pending_messages.put(key, txt)
             print(f"⏰ Message en attente mis à jour (ID: {e.message.id})")
-
-async def process_finalized_message(txt: str, chat_id: int):
-    """Traite un message finalisé et compte les cartes du 1er groupe"""
+    stage_timer.record("handle_edited", time.perf_counter() - started - waited)
+
+async def process_finalized_message(txt: str, chat_id: int, parsed: Optional[ParsedMessage] = None,
+                                    route: Optional[Route] = None) -> bool:
+    """
+    Traite un message finalisé et compte les cartes du 1er groupe. Retourne True
+    si le compteur a changé (l'instantané est publié par l'étape suivante de la file).
+    """
+    route = route or router.route_for(chat_id)
+    if route is None: return False
+    started = t = time.perf_counter()
     # Vérifier si le message a déjà été traité (évite double comptage)
     if database.is_message_processed(txt, chat_id):
+        stage_timer.lap("dedup_lookup", t)
+        MESSAGES_DEDUPLICATED.inc()
         print(f"⏭️ Message déjà traité, ignoré")
-        return
+        return False
+    t = stage_timer.lap("dedup_lookup", t)
 
     # Compter les cartes du 1er groupe
-    card_counter.add(txt)
+    route.counter.add(parsed or txt)
+    t = stage_timer.lap("counter_update", t)
+    MESSAGES_FINALIZED.inc()
     print(f"🃏 Cartes du 1er groupe comptées : {txt[:50]}...")
 
     # Marquer comme traité
     database.mark_message_processed(txt, chat_id)
-
-    # ===== ENVOI INSTANTANÉ (sans reset) =====
-    instant = card_counter.build_report()
-    if detected_display_channel:
-        try:
-            # Obtenir l'entité du canal avant d'envoyer
-            await client.send_message(int(detected_display_channel), instant)
-            print(f"📈 Instantané envoyé au canal : {instant}")
-        except Exception as ex:
-            print(f"❌ Erreur envoi instantané : {ex}")
-            try:
-                # Essayer de récupérer l'entité du canal d'abord
-                await client.get_entity(int(detected_display_channel))
-                await client.send_message(detected_display_channel, instant)
-                print(f"✅ Instantané envoyé (via entité) : {instant}")
-            except Exception as ex2:
-                print(f"❌ Échec total envoi : {ex2}")
+    stage_timer.lap("dedup_persist", t)
+
+    # ===== PRÉDICTIONS : résultat du canal source → statut des prédictions en attente =====
+    if route.name == DEFAULT_ROUTE and settings.get("auto_predictions"):
+        scheduler.handle_result(parsed or txt)
+
+    stage_timer.lap("process_finalized", started)
+    return True
+
+async def ingest_backfill_batch(chat_id: int, messages: list):
+    """Lot de rattrapage : anti-doublon puis comptage groupé par minute ; ⏰ mis en attente"""
+    route = router.route_for(chat_id)
+    if route is None: return
+    finals = []
+    for m in messages:
+        txt = m.message or ""
+        parsed = parse_cached(chat_id, m.id, txt)
+        if parsed.is_pending:
+            previous = pending_messages.get((chat_id, m.id))
+            if previous is None:
+                MESSAGES_PENDING.inc()
+            if previous != txt:
+                pending_messages.put((chat_id, m.id), txt)
+            continue
+        # Message en attente relu après son édition
+        pending_messages.pop((chat_id, m.id), promoted=parsed.is_finalized)
+        if parsed.is_finalized:
+            if database.is_message_processed(txt, chat_id):
+                MESSAGES_DEDUPLICATED.inc()
+                continue
+            database.mark_message_processed(txt, chat_id)
+            finals.append((int(m.date.timestamp() // 60), parsed))
+            if route.name == DEFAULT_ROUTE and settings.get("auto_predictions"):
+                scheduler.handle_result(parsed)
+    MESSAGES_RECEIVED.inc(len(messages), "backfill")
+    MESSAGES_FINALIZED.inc(len(finals))
+    for minute, group in groupby(finals, key=itemgetter(0)):
+        route.counter.add_many((p for _, p in group), at=minute * 60)
+    note_checkpoint(chat_id, messages[-1].id)
+    if finals:
+        route.notify()
+
+# ---------- METRICS ----------
+registry.gauge("bot_pending_messages", "Messages ⏰ actuellement en attente",
+               collect=lambda: {(): len(pending_messages)})
+registry.gauge("bot_outbound_queue_depth", "Envois Telegram en file",
+               collect=lambda: {(): outbound.depth()})
+registry.gauge("bot_route_queue_depth", "Événements en file de traitement par route", ("route",),
+               collect=lambda: {(r.name,): r.depth() for r in router.routes.values()})
+registry.gauge("bot_outbound_open_circuits", "Chats dont le coupe-circuit d'envoi est ouvert",
+               collect=lambda: {(): outbound.open_circuits()})
+registry.gauge("bot_suit_total", "Totaux par couleur de la période en cours", ("route", "suit"),
+               collect=lambda: {(r.name, s): n for r in router.routes.values() for s, n in r.counter._TOTAL.items()})
 
 # ---------- WEB SERVER ----------
 async def health(request): return web.Response(text="Bot OK")
+async def metrics_endpoint(request):
+    return web.Response(text=registry.render(), content_type="text/plain",
+                        headers={"X-Content-Type-Options": "nosniff"}, charset="utf-8")
 async def create_web():
     app = web.Application()
     app.router.add_get("/", health)
     app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics_endpoint)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, "0.0.0.0", PORT)
@@ -731,25 +494,54 @@ async def create_web():
 
 # ---------- START ----------
 async def main():
-    global detected_display_channel
-    load_config()
-    load_interval()
+    started = time.perf_counter()
+    # Session stable : pas de nouvelle connexion par jeton ni de cache d'entités vide à chaque démarrage
+    attach_client(TelegramClient(prepare_session(config.SESSION_NAME), API_ID, API_HASH))
     await create_web()
     await client.start(bot_token=BOT_TOKEN)
 
-    # Récupérer l'entité du canal d'affichage au démarrage
+    # Vérifier l'accès au canal d'affichage (servi par le cache de la session après le premier démarrage)
     if detected_display_channel:
         try:
-            entity = await client.get_entity(int(detected_display_channel))
-            print(f"✅ Canal d'affichage trouvé : {entity.title} (ID: {detected_display_channel})")
+            # Met aussi le pair en cache pour la file d'envoi
+            await outbound.peers.resolve(client, int(detected_display_channel))
+            print(f"✅ Canal d'affichage trouvé (ID: {detected_display_channel})")
         except Exception as ex:
             print(f"⚠️ Impossible d'accéder au canal d'affichage {detected_display_channel}: {ex}")
             print(f"💡 Assurez-vous que le bot est membre du canal et utilisez /set_display [ID] pour configurer")
 
-    restart_auto_bilan()
+    # Rattrapage des messages publiés pendant l'arrêt, avant le traitement en direct
+    # Chaque canal source est rattrapé indépendamment (en parallèle)
+    async def catch_up(chat_id: int):
+        try:
+            pending_ids = pending_messages.message_ids(chat_id)
+            if pending_ids:
+                found = await refetch_messages(client, chat_id, pending_ids,
+                                               lambda batch: ingest_backfill_batch(chat_id, batch),
+                                               batch_size=config.BACKFILL_BATCH_SIZE)
+                print(f"🔁 {found}/{len(pending_ids)} message(s) en attente relus pour {chat_id}")
+            await backfill_channel(client, chat_id, checkpoints.get(str(chat_id)),
+                                   lambda batch: ingest_backfill_batch(chat_id, batch),
+                                   limit=config.BACKFILL_MAX_MESSAGES, batch_size=config.BACKFILL_BATCH_SIZE)
+        except Exception as ex:
+            print(f"⚠️ Rattrapage de {chat_id} interrompu : {ex}")
+    try:
+        await asyncio.gather(*(catch_up(chat_id) for chat_id in router.sources()))
+    finally:
+        live_ready.set()
+
+    router.start()
+    on_predictions_change("auto_predictions", settings.get("auto_predictions"), None)
+    asyncio.create_task(maintenance_loop())
     me = await client.get_me()
-    print(f"Bot connecté : @{me.username}")
-    await client.run_until_disconnected()
+    client.session.save()
+    print(f"Bot connecté : @{me.username} (prêt en {time.perf_counter() - started:.1f}s)")
+    try:
+        await client.run_until_disconnected()
+    finally:
+        # Vidage forcé des écritures différées avant l'arrêt
+        save_state()
+        persister.close()
 
 if __name__ == "__main__":
     import asyncio
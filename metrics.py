@@ -0,0 +1,156 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bornes par défaut des histogrammes (secondes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt(value: float) -> str:
+    if value == float("inf"): return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()  # le thread d'écriture différée observe aussi
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Compteur monotone, éventuellement étiqueté"""
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        values = self._values or ({} if self.label_names else {(): 0})
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_fmt(value)}")
+        return lines
+
+class Gauge(_Metric):
+    """Valeur instantanée ; `collect` (si fourni) est appelé à chaque lecture de /metrics"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), collect: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        if self.collect:
+            try:
+                values.update(self.collect())
+            except Exception as e:
+                print(f"⚠️ Métrique {self.name} indisponible : {e}")
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_fmt(value)}")
+        return lines
+
+class Histogram(_Metric):
+    """Histogramme à seaux cumulés (format Prometheus)"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # étiquettes → [compte par seau (+Inf en dernier), somme, total]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def total(self, *labels) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), collect=None) -> Gauge:
+        return self._metrics.get(name) or self.register(Gauge(name, help_text, labels, collect))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Format d'exposition texte Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# ---- métriques du bot ----
+MESSAGES_RECEIVED   = registry.counter("bot_messages_received_total", "Messages reçus des canaux sources", ("event",))
+MESSAGES_FINALIZED  = registry.counter("bot_messages_finalized_total", "Messages finalisés (✅/🔰) comptés")
+MESSAGES_DEDUPLICATED = registry.counter("bot_messages_deduplicated_total", "Messages finalisés ignorés car déjà traités")
+MESSAGES_PENDING    = registry.counter("bot_messages_pending_total", "Messages ⏰ mis en attente")
+END_TO_END_LATENCY  = registry.histogram("bot_end_to_end_latency_seconds",
+                                         "Réception de l'événement Telegram → envoi de l'affichage terminé")
+TELEGRAM_LATENCY    = registry.histogram("bot_telegram_api_latency_seconds", "Durée des appels API Telegram", ("method",))
+PIPELINE_BACKPRESSURE = registry.counter("bot_pipeline_backpressure_total", "Événements mis en attente car la file de la route était pleine", ("route",))
+PIPELINE_SHED       = registry.counter("bot_pipeline_shed_total", "Instantanés délestés pendant la saturation de la file", ("route",))
+SAVE_DURATION       = registry.histogram("bot_save_duration_seconds", "Durée des écritures de fichiers de données", ("file",),
+                                         buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
@@ -0,0 +1,291 @@
+import asyncio, itertools, time
+from metrics import TELEGRAM_LATENCY
+from typing import Any, Dict, Optional
+from telethon.errors import (FloodWaitError, MessageNotModifiedError, MessageIdInvalidError,
+                             ChatWriteForbiddenError, ChatAdminRequiredError, ChannelPrivateError,
+                             PeerIdInvalidError, ChannelInvalidError, ChatIdInvalidError)
+
+# Priorités (plus petit = plus prioritaire)
+PRIORITY_BILAN    = 0   # bilans horaires / manuels
+PRIORITY_EDIT     = 1   # mises à jour des prédictions
+PRIORITY_SNAPSHOT = 2   # compteur instantané
+
+# Erreurs propres au message : le canal lui-même fonctionne
+MESSAGE_ERRORS = (MessageNotModifiedError, MessageIdInvalidError)
+# Pair inconnu ou périmé (ValueError : entité introuvable) : une seule nouvelle résolution
+INVALID_PEER_ERRORS = (PeerIdInvalidError, ChannelInvalidError, ChatIdInvalidError, ValueError)
+# Erreurs définitives : inutile de réessayer
+PERMANENT_ERRORS = (ChatWriteForbiddenError, ChatAdminRequiredError, ChannelPrivateError, TypeError)
+
+class CircuitOpenError(Exception):
+    """Envoi abandonné : trop d'échecs récents vers ce chat"""
+
+class PeerResolver:
+    """Cache chat_id → InputPeer ; une entrée n'est renouvelée qu'après une erreur de pair"""
+
+    def __init__(self):
+        self._cache: Dict[int, Any] = {}
+        self.lookups = 0
+
+    async def resolve(self, client, chat_id):
+        if not isinstance(chat_id, int): return chat_id
+        peer = self._cache.get(chat_id)
+        if peer is None:
+            peer = await client.get_input_entity(chat_id)
+            self._cache[chat_id] = peer
+            self.lookups += 1
+        return peer
+
+    def invalidate(self, chat_id):
+        self._cache.pop(chat_id, None)
+
+    def clear(self):
+        self._cache.clear()
+
+class CircuitBreaker:
+    """
+    Coupe-circuit par chat : ouvert après `threshold` échecs consécutifs ;
+    après `cooldown` secondes un seul envoi d'essai passe (et relance le délai),
+    son succès referme le circuit.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def retry_after(self) -> float:
+        """0 si l'envoi peut partir, sinon le délai avant le prochain essai"""
+        if self.opened_at is None: return 0.0
+        now = time.monotonic()
+        remaining = self.opened_at + self.cooldown - now
+        if remaining > 0: return remaining
+        self.opened_at = now  # envoi d'essai ; les suivants attendent son issue
+        return 0.0
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> bool:
+        """Retourne True si le circuit vient de s'ouvrir"""
+        self.failures += 1
+        if self.failures < self.threshold: return False
+        just_opened = self.opened_at is None
+        self.opened_at = time.monotonic()
+        return just_opened
+
+class TokenBucket:
+    """Limiteur à jetons : `rate` envois par seconde, rafale de `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Réserve un jeton ; retourne le délai d'attente avant de pouvoir l'utiliser"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def refund(self):
+        self.tokens += 1
+
+    def block(self, seconds: float):
+        """FloodWait : aucun envoi vers ce chat avant `seconds`"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class _Job:
+    __slots__ = ("method", "chat_id", "args", "kwargs", "future", "attempts", "deferrals", "refreshed")
+
+    def __init__(self, method, chat_id, args, kwargs, future):
+        self.method = method
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+        self.deferrals = 0      # reports pendant que le circuit est ouvert
+        self.refreshed = False  # pair déjà résolu à nouveau après une erreur
+
+class OutboundQueue:
+    """
+    File d'envoi centralisée vers Telegram : priorités, limiteur par chat,
+    gestion des FloodWait et nouvelles tentatives avec temporisation.
+    Les appels retournent immédiatement un Future ; les gestionnaires de
+    messages n'attendent donc jamais le réseau. Les pairs résolus sont mis en
+    cache ; un chat en échec répété ouvre son coupe-circuit : les instantanés
+    sont abandonnés, les autres envois reportés jusqu'à l'essai suivant.
+    """
+
+    def __init__(self, client, rate_per_chat: float = 1.0, burst: int = 3,
+                 workers: int = 4, max_retries: int = 5, base_backoff: float = 1.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 60.0):
+        self.client = client
+        self.rate_per_chat = rate_per_chat
+        self.burst = burst
+        self.workers = workers
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._breakers: Dict[Any, CircuitBreaker] = {}
+        self.peers = PeerResolver()
+        self._seq = itertools.count()
+        self._tasks = []
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+        self.dropped = 0
+
+    # ---- API ----
+    def submit(self, method: str, chat_id, *args, priority: int = PRIORITY_SNAPSHOT, **kwargs) -> asyncio.Future:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._log_failure)
+        self._put(priority, _Job(method, chat_id, args, kwargs, future))
+        return future
+
+    def send_message(self, chat_id, text: str, priority: int = PRIORITY_SNAPSHOT, **kwargs) -> asyncio.Future:
+        return self.submit("send_message", chat_id, text, priority=priority, **kwargs)
+
+    def edit_message(self, chat_id, message_id: int, text: str, priority: int = PRIORITY_EDIT, **kwargs) -> asyncio.Future:
+        return self.submit("edit_message", chat_id, message_id, text, priority=priority, **kwargs)
+
+    def pin_message(self, chat_id, message_id: int, priority: int = PRIORITY_SNAPSHOT, **kwargs) -> asyncio.Future:
+        return self.submit("pin_message", chat_id, message_id, priority=priority, **kwargs)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def open_circuits(self) -> int:
+        return sum(1 for b in self._breakers.values() if b.is_open)
+
+    # ---- fonctionnement interne ----
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def _put(self, priority: int, job: _Job):
+        self._queue.put_nowait((priority, next(self._seq), job))
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate_per_chat, self.burst)
+        return bucket
+
+    def _breaker(self, chat_id) -> CircuitBreaker:
+        breaker = self._breakers.get(chat_id)
+        if breaker is None:
+            breaker = self._breakers[chat_id] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return breaker
+
+    async def _worker(self):
+        while True:
+            priority, _, job = await self._queue.get()
+            try:
+                await self._execute(priority, job)
+            except Exception as ex:
+                print(f"❌ Erreur file d'envoi : {ex}")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, priority: int, job: _Job):
+        if job.future.done(): return  # annulé par l'appelant
+        breaker = self._breaker(job.chat_id)
+        blocked = breaker.retry_after()
+        if blocked > 0:
+            if priority >= PRIORITY_SNAPSHOT or job.deferrals >= self.max_retries:
+                self.dropped += 1
+                self._fail(job, CircuitOpenError(f"circuit ouvert pour {job.chat_id}"))
+            else:
+                job.deferrals += 1
+                asyncio.get_running_loop().call_later(blocked, self._put, priority, job)
+            return
+        bucket = self._bucket(job.chat_id)
+        wait = bucket.reserve()
+        if wait > 1.0:
+            # Longue attente (FloodWait) : libérer le worker pour les autres chats
+            bucket.refund()
+            asyncio.get_running_loop().call_later(wait, self._put, priority, job)
+            return
+        if wait > 0:
+            await asyncio.sleep(wait)
+        job.attempts += 1
+        started = time.perf_counter()
+        try:
+            peer = await self.peers.resolve(self.client, job.chat_id)
+            result = await getattr(self.client, job.method)(peer, *job.args, **job.kwargs)
+        except FloodWaitError as ex:
+            self.flood_waits += 1
+            bucket.block(ex.seconds)
+            print(f"⏳ FloodWait {ex.seconds}s pour {job.chat_id} ({job.method})")
+            self._retry(priority, job, ex, delay=0)
+            return
+        except MESSAGE_ERRORS as ex:
+            breaker.success()
+            self._fail(job, ex)
+            return
+        except INVALID_PEER_ERRORS as ex:
+            self.peers.invalidate(job.chat_id)
+            if not job.refreshed:
+                job.refreshed = True
+                self._put(priority, job)
+                return
+            self._trip(breaker, job)
+            self._fail(job, ex)
+            return
+        except PERMANENT_ERRORS as ex:
+            self._trip(breaker, job)
+            self._fail(job, ex)
+            return
+        except Exception as ex:
+            self._trip(breaker, job)
+            self._retry(priority, job, ex, delay=self.base_backoff * 2 ** (job.attempts - 1))
+            return
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, job.method)
+        breaker.success()
+        self.sent += 1
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def _trip(self, breaker: CircuitBreaker, job: _Job):
+        if breaker.failure():
+            print(f"🔌 Circuit ouvert pour {job.chat_id} après {breaker.failures} échecs : "
+                  f"envois suspendus {breaker.cooldown:.0f}s")
+
+    def _retry(self, priority: int, job: _Job, ex: Exception, delay: float):
+        if job.attempts >= self.max_retries:
+            self._fail(job, ex)
+            return
+        print(f"🔁 Nouvelle tentative {job.method} → {job.chat_id} dans {delay:.1f}s ({ex})")
+        asyncio.get_running_loop().call_later(delay, self._put, priority, job)
+
+    def _fail(self, job: _Job, ex: Exception):
+        self.failed += 1
+        if not job.future.done():
+            job.future.set_exception(ex)
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if future.cancelled(): return
+        ex = future.exception()
+        if ex is not None and not isinstance(ex, (MessageNotModifiedError, CircuitOpenError)):
+            print(f"❌ Échec envoi Telegram : {ex}")
@@ -0,0 +1,486 @@
+"""
+Paquets de déploiement /deploy (joueu2.zip) et /dep (render10k.zip).
+La construction (lecture des sources + compression) tourne dans un thread ;
+l'archive est mise en cache sous l'empreinte SHA256 de son contenu, et un
+nouvel appel avec des sources inchangées la réutilise sans reconstruire.
+"""
+import asyncio, hashlib, os, shutil, zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+from storage import DATA_DIR
+
+Entries = List[Tuple[str, bytes]]
+
+# ---------- MODÈLES ----------
+RUNTIME = "python-3.11.10"
+
+REQUIREMENTS = """telethon==1.35.0
+aiohttp==3.9.5
+PyYAML==6.0.1
+python-dotenv==1.0.1
+"""
+
+RENDER_YAML = """services:
+  - type: web
+    name: telegram-card-counter-bot
+    env: python
+    runtime: python-3.11.10
+    buildCommand: pip install -r requirements.txt
+    startCommand: python main.py
+    envVars:
+      - key: PORT
+        value: 10000
+      - key: API_ID
+        sync: false
+      - key: API_HASH
+        sync: false
+      - key: BOT_TOKEN
+        sync: false
+      - key: ADMIN_ID
+        sync: false
+      - key: DISPLAY_CHANNEL
+        sync: false
+"""
+
+ENV_EXAMPLE_DEPLOY = """API_ID=your_api_id
+API_HASH=your_api_hash
+BOT_TOKEN=your_bot_token
+ADMIN_ID=your_admin_id
+DISPLAY_CHANNEL=-1003216148681
+PORT=10000
+"""
+
+ENV_EXAMPLE_RENDER = """API_ID=your_api_id
+API_HASH=your_api_hash
+BOT_TOKEN=your_bot_token
+ADMIN_ID=your_admin_id
+DISPLAY_CHANNEL=0
+PORT=10000
+"""
+
+GITIGNORE = """# Telegram sessions
+*.session
+*.session-journal
+
+# Environment
+.env
+.env.local
+
+# Python
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+
+# Data
+data/
+*.json
+*.yaml
+*.yml
+
+# IDE
+.vscode/
+.idea/
+
+# Logs
+*.log
+
+# OS
+.DS_Store
+Thumbs.db
+"""
+
+README_DEPLOY = """# jou34 - Compteur de Cartes Telegram
+
+## 🎯 Fonctionnalité Principale
+Ce bot compte **UNIQUEMENT le 1er groupe** de cartes entre parenthèses.
+
+**Exemple:**
+- Message: `(♠️♥️♦️♣️) - (A♠️2♥️)` → Compte seulement `♠️♥️♦️♣️`
+- Le deuxième groupe `(A♠️2♥️)` est complètement ignoré
+
+## ⚙️ Caractéristiques
+✅ Comptage instantané (format simple avec émojis)
+✅ Bilan horaire automatique (format décoré avec barres de progression)
+✅ Envoi automatique chaque heure pile (10:00, 11:00, 12:00, etc.)
+✅ Anti-doublon avec hash SHA256
+✅ Gestion messages en attente (⏰) et finalisés (✅/🔰)
+✅ Stockage YAML (sans base de données)
+✅ Health check endpoint pour monitoring
+✅ **Configuration canaux pré-configurée** dans config.py
+
+## 🚀 Déploiement sur Render.com
+
+### Prérequis
+- Compte Render.com (gratuit)
+- Telegram API credentials (my.telegram.org)
+- Bot Token (@BotFather)
+
+### Étapes de déploiement
+
+1. **Créer un Web Service sur Render.com**
+   - Aller sur https://render.com
+   - Cliquer sur "New +" → "Web Service"
+   - Connecter votre repo GitHub ou uploader le code
+
+2. **Configuration du service**
+   - Name: `telegram-card-counter-bot`
+   - Environment: `Python 3`
+   - Build Command: `pip install -r requirements.txt`
+   - Start Command: `python main.py`
+
+3. **Configuration des canaux** (IMPORTANT - Avant déploiement)
+   - Ouvrir `config.py`
+   - Modifier `STAT_CHANNEL_ID` avec l'ID de votre canal source
+   - Modifier `DISPLAY_CHANNEL_ID` avec l'ID de votre canal d'affichage
+   - Les canaux sont pré-configurés et persistants
+
+4. **Variables d'environnement** (dans l'onglet Environment)
+   ```
+   API_ID=votre_api_id
+   API_HASH=votre_api_hash
+   BOT_TOKEN=votre_bot_token
+   ADMIN_ID=votre_telegram_user_id
+   PORT=10000
+   ```
+   Note: DISPLAY_CHANNEL est optionnel, la valeur de config.py sera utilisée par défaut
+
+5. **Déployer**
+   - Cliquer sur "Create Web Service"
+   - Attendre la fin du déploiement (5-10 minutes)
+   - Vérifier les logs pour confirmer: "Bot connecté"
+
+## 📋 Commandes du Bot
+
+- `/start` - Démarrer le bot
+- `/status` - Voir la configuration et l'état
+- `/set_stat [id]` - Configurer le canal source
+- `/set_display [id]` - Configurer le canal d'affichage
+- `/bilan [15 | 3h]` - Bilan sur une fenêtre glissante (sans reset)
+- `/reset` - Réinitialiser le compteur
+
+## 📊 Fonctionnement
+
+### Messages en attente
+- Messages avec ⏰ → Mis en file d'attente
+- À l'édition vers ✅ ou 🔰 → Traitement automatique
+
+### Comptage
+- **Instant** : Format simple envoyé immédiatement
+  ```
+  📈 Compteur instantané
+  ♠️ : 5  (25.0 %)
+  ♥️ : 8  (40.0 %)
+  ♦️ : 4  (20.0 %)
+  ♣️ : 3  (15.0 %)
+  ```
+
+- **Bilan horaire** : Format décoré avec reset automatique
+  ```
+  ╔════════════════════╗
+  📊 Bilan 📊
+  ╚════════════════════╝
+
+  🖤 ♠️ PIQUE
+  ├─ Compteur: 5 cartes
+  ├─ Pourcentage: 25.0%
+  └─ ⬛⬛⬜⬜⬜⬜⬜⬜⬜⬜
+  ```
+
+## 🔧 Architecture Technique
+
+- **Port**: 10000 (obligatoire pour Render.com)
+- **Python**: 3.11.10 (requis pour Telethon)
+- **Stockage**: YAML (dossier `data/`)
+- **Health check**: `/health` endpoint
+
+## ⚠️ Important
+
+### Version Python
+**Python 3.11.10 est OBLIGATOIRE**
+- ❌ Python 3.13+ causera des erreurs avec Telethon
+- ✅ `runtime.txt` contient `python-3.11.10`
+
+### Port
+Le port 10000 est **pré-configuré** et **obligatoire** pour Render.com
+
+### Permissions Telegram
+Le bot doit être:
+- Membre du canal source (pour lire les messages)
+- Membre du canal d'affichage (pour envoyer les rapports)
+
+## 📈 Monitoring
+
+- **Logs**: Dashboard Render.com en temps réel
+- **Health check**: `https://votre-app.onrender.com/health`
+- **Status**: Console output avec timestamps détaillés
+
+## 🐛 Résolution de problèmes
+
+### "File .../asyncio/runners.py" error
+- ❌ Cause: Python 3.13 incompatible
+- ✅ Solution: Vérifier que `runtime.txt` contient `python-3.11.10`
+
+### Build Failed
+- Vérifier que toutes les variables d'environnement sont définies
+- S'assurer que `render.yaml` spécifie `runtime: python-3.11.10`
+
+### Bot ne reçoit pas les messages
+- Vérifier que le bot est membre du canal avec `/set_stat [id]`
+- Confirmer l'ID du canal (format: `-100xxxxxxxxxx`)
+
+## 📦 Fichiers Inclus
+
+- `main.py` - Application principale (PORT=10000)
+- `config.py` - **Configuration centralisée des canaux (PRÉ-CONFIGURÉ)**
+- `card_counter.py` - Logique de comptage
+- `predictor.py` - Système de prédictions
+- `yaml_manager.py` - Gestion YAML
+- `scheduler.py` - Planification
+- `requirements.txt` - Dépendances
+- `runtime.txt` - Python 3.11.10
+- `render.yaml` - Config Render.com
+- `.env.example` - Template variables
+- `.gitignore` - Fichiers à ignorer
+
+🎯 **jou34** - Prêt pour déploiement Replit!
+
+## 📋 Configuration Canaux Pré-Configurée
+- **Canal Source**: -1002682552255 (lecture des messages de cartes)
+- **Canal Affichage**: -1002674389383 (envoi des rapports)
+- Ces canaux sont déjà configurés dans `config.py`
+- Modifiez `config.py` avant déploiement si nécessaire
+- **Comptage**: 1er groupe uniquement
+"""
+
+README_RENDER = """# Package render10k - Déploiement Render.com (Port 10000)
+
+## ⚠️ IMPORTANT - Version Python
+**Ce bot nécessite Python 3.11.10** pour compatibilité avec Telethon.
+- ❌ Python 3.13+ causera des erreurs asyncio
+- ✅ Python 3.11.10 est préconfiguré dans runtime.txt
+
+## 🎯 Fonctionnalité du comptage
+**Le bot compte UNIQUEMENT le 2ème groupe entre parenthèses**
+- Message exemple: `(groupe1)(♠️♥️♦️♣️)` → Compte seulement `♠️♥️♦️♣️`
+- Le premier groupe est complètement ignoré
+
+## 🚀 Instructions de déploiement sur Render.com:
+
+1. **Créer un compte Render.com**
+   - Aller sur https://render.com
+   - S'inscrire ou se connecter avec GitHub
+
+2. **Créer un nouveau Web Service**
+   - Cliquer sur "New +" → "Web Service"
+   - Connecter votre repository GitHub ou uploader le code
+
+3. **Configuration du service**
+   - **Name**: telegram-card-counter-bot
+   - **Environment**: Python 3
+   - **Build Command**: `pip install -r requirements.txt`
+   - **Start Command**: `python main.py`
+   - **Port**: 10000 (automatique via render.yaml)
+
+4. **Configurer les variables d'environnement**
+   Dans l'onglet "Environment", ajouter:
+   - `API_ID`: Votre Telegram API ID (my.telegram.org)
+   - `API_HASH`: Votre Telegram API Hash
+   - `BOT_TOKEN`: Token du bot (@BotFather)
+   - `ADMIN_ID`: Votre Telegram User ID
+   - `DISPLAY_CHANNEL`: ID du canal d'affichage (optionnel)
+   - `PORT`: 10000 (déjà configuré)
+
+5. **Déployer**
+   - Cliquer sur "Create Web Service"
+   - Le déploiement démarre automatiquement
+   - Vérifier les logs pour confirmer la connexion
+
+## 📋 Caractéristiques render10k:
+✅ **Comptage 2ème groupe UNIQUEMENT**: Ignore le 1er groupe, compte seulement le 2ème
+✅ **Port 10000**: Configuration Render.com optimisée
+✅ **Base YAML**: Stockage sans PostgreSQL
+✅ **Gestion file d'attente**: Messages ⏰ → ✅/🔰
+✅ **Anti-doublon**: Hash SHA256 pour éviter le double comptage
+✅ **Rapports automatiques**: Intervalle configurable
+✅ **Prédictions**: Système de prédictions de cartes
+✅ **Health Check**: Endpoint /health pour monitoring
+
+## 🔧 Commandes disponibles:
+- `/status` - État complet du système
+- `/set_stat [id]` - Configurer canal source
+- `/set_display [id]` - Configurer canal affichage
+- `/intervalle [min]` - Intervalle rapports (1-120 min)
+- `/bilan` - Rapport immédiat et reset
+- `/reset` - Réinitialiser compteur
+- `/deploy` - Package render_deploy.zip
+- `/dep` - Package de2000.zip (Render.com optimisé)
+
+## 📊 Architecture:
+- **main.py**: Application principale avec port 10000
+- **card_counter.py**: Logique de comptage de cartes
+- **predictor.py**: Système de prédictions
+- **yaml_manager.py**: Gestion données YAML
+- **scheduler.py**: Planification automatique
+- **render.yaml**: Configuration déploiement Render.com
+- **runtime.txt**: Python 3.11.10 (OBLIGATOIRE)
+- **requirements.txt**: Dépendances testées et compatibles
+
+## 🌐 Endpoints:
+- `GET /health`: Health check (retourne "Bot OK")
+- `GET /`: Root endpoint (retourne "Bot OK")
+
+## 🗄️ Stockage YAML:
+- `data/bot_config.yaml`: Configuration persistante (canaux, intervalle)
+- `data/predictions.yaml`: Historique prédictions
+- `data/auto_predictions.yaml`: Planification auto
+- `data/message_log.journal`: Anti-doublon messages
+- `bot_config.json` / `interval.json`: Anciens fichiers, importés une seule fois au démarrage
+
+## ⚙️ Fonctionnement:
+1. **Messages en attente (⏰)**: Mis en file d'attente
+2. **Messages édités**: Détection ⏰ → ✅/🔰
+3. **Messages finalisés (✅/🔰)**: Comptage immédiat du 2ème groupe
+4. **Comptage 2ème groupe**: Le bot ignore le 1er groupe (X)(Y) et compte seulement Y
+5. **Anti-doublon**: Hash SHA256 + YAML log
+6. **Rapports**: Instantanés + périodiques configurables
+
+## ⚠️ Important:
+- Le dossier `data/` est créé automatiquement
+- La session Telegram est conservée dans `data/bot.session` (TELEGRAM_SESSION pour un disque éphémère)
+- Configuration sauvegardée en YAML + JSON
+- Port 10000 OBLIGATOIRE pour Render.com
+- Variables d'environnement via dashboard Render.com
+
+## 🔧 Résolution des problèmes courants:
+
+### Erreur "File .../asyncio/runners.py"
+- ❌ Cause: Python 3.13 incompatible avec Telethon
+- ✅ Solution: runtime.txt contient python-3.11.10
+
+### Build Failed sur Render.com
+- Vérifier que runtime.txt existe et contient python-3.11.10
+- Vérifier que render.yaml spécifie runtime: python-3.11.10
+- S'assurer que toutes les variables d'environnement sont définies
+
+## 🚀 Déploiement rapide:
+```bash
+# 1. Décompresser render10k.zip
+unzip render10k.zip
+
+# 2. Upload sur Render.com ou GitHub
+git init
+git add .
+git commit -m "Initial commit"
+git push origin main
+
+# 3. Connecter sur Render.com et déployer
+# Les variables sont dans .env.example
+```
+
+## 📈 Monitoring:
+- Logs en temps réel dans dashboard Render.com
+- Health check automatique: `https://your-app.onrender.com/health`
+- Console output détaillé avec timestamps
+
+🎯 Package render10k prêt pour déploiement Render.com!
+✅ Python 3.11.10 + Port 10000 + Configuration complète
+"""
+
+# ---------- CONTENU DES PAQUETS ----------
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _main_source(default_port: str) -> bytes:
+    """main.py avec le port par défaut de Render.com (10000)"""
+    content = _read("main.py").decode("utf-8")
+    content = content.replace(f"PORT     = int(os.getenv('PORT', {default_port}))",
+                              "PORT     = int(os.getenv('PORT', 10000))")
+    return content.encode("utf-8")
+
+def _sources(source_files: Iterable[str]) -> Entries:
+    return [(f, _read(f)) for f in source_files if os.path.exists(f)]
+
+def deploy_entries(source_files: Iterable[str]) -> Entries:
+    """joueu2.zip : déploiement complet (1er groupe)"""
+    return ([("main.py", _main_source("10000"))] + _sources(source_files) + [
+        ("runtime.txt", RUNTIME.encode()),
+        ("requirements.txt", REQUIREMENTS.encode()),
+        ("render.yaml", RENDER_YAML.encode()),
+        (".env.example", ENV_EXAMPLE_DEPLOY.encode()),
+        (".gitignore", GITIGNORE.encode()),
+        ("README.md", README_DEPLOY.encode("utf-8")),
+    ])
+
+def render_entries(source_files: Iterable[str]) -> Entries:
+    """render10k.zip : Render.com (Python 3.11 + port 10000)"""
+    entries = [("main.py", _main_source("8000"))] + _sources(source_files) + [
+        ("runtime.txt", RUNTIME.encode()),
+        ("requirements.txt", REQUIREMENTS.encode()),
+    ]
+    entries += _sources([".gitignore"])
+    return entries + [
+        ("render.yaml", RENDER_YAML.encode()),
+        (".env.example", ENV_EXAMPLE_RENDER.encode()),
+        ("README_RENDER.md", README_RENDER.encode("utf-8")),
+    ]
+
+# nom du paquet → (nom de l'archive, contenu)
+PACKAGES: Dict[str, Tuple[str, Callable[[Iterable[str]], Entries]]] = {
+    "deploy": ("joueu2.zip", deploy_entries),
+    "render": ("render10k.zip", render_entries),
+}
+
+# ---------- CACHE ----------
+class ArtifactCache:
+    """
+    Archives construites, rangées sous data/packages/<paquet>-<empreinte>/<archive>.
+    Seule la dernière version de chaque paquet est conservée.
+    """
+
+    def __init__(self, directory: Path = DATA_DIR / "packages"):
+        self.directory = Path(directory)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.builds = 0
+        self.hits = 0
+
+    @staticmethod
+    def digest(entries: Entries) -> str:
+        h = hashlib.sha256()
+        for name, data in entries:
+            h.update(name.encode("utf-8") + b"\0" + len(data).to_bytes(8, "big"))
+            h.update(data)
+        return h.hexdigest()
+
+    def get_or_build(self, package: str, source_files: Iterable[str]) -> Tuple[Path, bool]:
+        """(chemin de l'archive, True si reprise du cache) ; bloquant, à appeler hors de la boucle"""
+        zip_name, build_entries = PACKAGES[package]
+        entries = build_entries(source_files)
+        folder = self.directory / f"{package}-{self.digest(entries)[:16]}"
+        target = folder / zip_name
+        if target.exists():
+            self.hits += 1
+            return target, True
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = folder / (zip_name + ".tmp")
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+            for name, data in entries:
+                z.writestr(name, data)
+        os.replace(tmp, target)
+        self.builds += 1
+        # Versions précédentes du même paquet
+        for old in self.directory.glob(f"{package}-*"):
+            if old != folder:
+                shutil.rmtree(old, ignore_errors=True)
+        return target, False
+
+    async def build(self, package: str, source_files: Iterable[str]) -> Tuple[Path, bool]:
+        """Construit dans un thread ; deux demandes simultanées du même paquet n'en construisent qu'un"""
+        lock = self._locks.setdefault(package, asyncio.Lock())
+        async with lock:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.get_or_build, package, list(source_files))
+
+artifacts = ArtifactCache()
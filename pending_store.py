@@ -0,0 +1,94 @@
+import json, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, List, Optional, Tuple
+from persister import persister
+
+class PendingStore:
+    """
+    Messages ⏰ en attente de leur édition finale. Taille bornée (les plus
+    anciens sont évincés) et expiration après `ttl` secondes sans mise à jour.
+    Optionnellement sauvegardé pour survivre à un redémarrage.
+    """
+
+    def __init__(self, max_size: int = 5000, ttl: float = 6 * 3600, path: Optional[Path] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        # clé (chat_id, message_id) → (texte, horodatage de la dernière mise à jour)
+        self._items: "OrderedDict[Tuple[int, int], Tuple[str, float]]" = OrderedDict()
+        self._dirty = False
+        self.evicted_ttl = 0
+        self.evicted_size = 0
+        self.promotions = 0
+        self.dropped = 0
+        self._load()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        item = self._items.get(key)
+        return item[0] if item else None
+
+    def message_ids(self, chat_id: int) -> List[int]:
+        """Ids des messages en attente pour un canal"""
+        return [key[1] for key in self._items if key[0] == chat_id]
+
+    def put(self, key: Hashable, text: str, now: Optional[float] = None):
+        self._items[key] = (text, time.time() if now is None else now)
+        self._items.move_to_end(key)
+        self._dirty = True
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evicted_size += 1
+
+    def pop(self, key: Hashable, promoted: bool = False) -> Optional[str]:
+        """Retire le message ; promoted=True s'il a été finalisé (✅/🔰)"""
+        item = self._items.pop(key, None)
+        if item is None: return None
+        self._dirty = True
+        if promoted:
+            self.promotions += 1
+        else:
+            self.dropped += 1
+        return item[0]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Évince les messages non mis à jour depuis plus de ttl secondes"""
+        limit = (time.time() if now is None else now) - self.ttl
+        expired = 0
+        while self._items:
+            key, (_, ts) = next(iter(self._items.items()))
+            if ts >= limit: break
+            del self._items[key]
+            expired += 1
+        if expired:
+            self.evicted_ttl += expired
+            self._dirty = True
+        return expired
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "promotions": self.promotions, "dropped": self.dropped,
+                "evicted_ttl": self.evicted_ttl, "evicted_size": self.evicted_size}
+
+    # ---- persistance ----
+    def _load(self):
+        if not self.path or not self.path.exists(): return
+        try:
+            for chat_id, message_id, text, ts in json.loads(self.path.read_text(encoding="utf-8")):
+                self._items[(chat_id, message_id)] = (text, ts)
+            self.expire()
+            print(f"✅ {len(self._items)} messages en attente restaurés")
+        except Exception as e:
+            print(f"❌ Erreur chargement {self.path} : {e}")
+
+    def save(self):
+        """Sauvegarde différée si le contenu a changé depuis la dernière fois"""
+        if not self.path or not self._dirty: return
+        snapshot = [(k[0], k[1], text, ts) for k, (text, ts) in self._items.items()]
+        persister.write(self.path, lambda: json.dumps(snapshot, ensure_ascii=False))
+        self._dirty = False
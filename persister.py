@@ -0,0 +1,154 @@
+import os, threading, time, atexit
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+from metrics import SAVE_DURATION
+
+Content = Union[str, Callable[[], str]]
+
+class _Pending:
+    __slots__ = ("content", "appends", "callbacks")
+
+    def __init__(self):
+        self.content = None   # contenu complet à écrire (str ou fonction qui le produit)
+        self.appends = []     # lignes à ajouter après le contenu
+        self.callbacks = []   # fonctions à exécuter dans le thread d'écriture
+
+class WriteBehindPersister:
+    """
+    Écriture différée des documents : les appels depuis la boucle asyncio ne font
+    que marquer le document comme modifié ; un thread dédié écrit les lots
+    (écriture atomique : fichier temporaire + fsync + rename).
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None):
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("PERSIST_FLUSH_INTERVAL", "1.0"))
+        self._pending: Dict[str, _Pending] = {}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+
+    # ---- API appelée depuis la boucle ----
+    def _entry(self, path) -> _Pending:
+        key = str(path)
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = _Pending()
+        return entry
+
+    def write(self, path: Union[str, Path], content: Content):
+        """Remplace tout le document ; les ajouts encore en attente deviennent inutiles"""
+        with self._cond:
+            entry = self._entry(path)
+            entry.content = content
+            entry.appends = []
+            self._wake()
+
+    def append(self, path: Union[str, Path], text: str):
+        with self._cond:
+            self._entry(path).appends.append(text)
+            self._wake()
+
+    def defer(self, key: Union[str, Path], callback: Callable[[], Any]):
+        """Exécute callback dans le thread d'écriture (une seule fois par lot et par clé)"""
+        with self._cond:
+            entry = self._entry(key)
+            if callback not in entry.callbacks:
+                entry.callbacks.append(callback)
+            self._wake()
+
+    def _wake(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    # ---- thread d'écriture ----
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+            # Laisser les modifications s'accumuler pour écrire en un seul lot
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Écrit immédiatement tout ce qui est en attente (appelable depuis n'importe quel thread)"""
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch: return
+            dirs = set()
+            for key, entry in batch.items():
+                started = time.perf_counter()
+                try:
+                    for callback in entry.callbacks:
+                        callback()
+                    if entry.content is not None:
+                        content = entry.content() if callable(entry.content) else entry.content
+                        self._atomic_write(Path(key), content + "".join(entry.appends))
+                        dirs.add(Path(key).parent)
+                    elif entry.appends:
+                        self._append(Path(key), "".join(entry.appends))
+                    self.writes += 1
+                    SAVE_DURATION.observe(time.perf_counter() - started, Path(key).name)
+                except Exception as e:
+                    print(f"❌ Erreur écriture différée {key} : {e}")
+                    self._requeue(key, entry)
+            for d in dirs:
+                self._fsync_dir(d)
+            self.batches += 1
+
+    def _requeue(self, key: str, failed: _Pending):
+        with self._cond:
+            entry = self._entry(key)
+            if entry.content is None:
+                entry.content = failed.content
+                entry.appends = failed.appends + entry.appends
+            entry.callbacks = failed.callbacks + [c for c in entry.callbacks if c not in failed.callbacks]
+
+    @staticmethod
+    def _atomic_write(path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _append(path: Path, text: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _fsync_dir(directory: Path):
+        try:
+            fd = os.open(str(directory or "."), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Vidage forcé à l'arrêt du bot"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+persister = WriteBehindPersister()
+atexit.register(persister.close)
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Union
+from metrics import PIPELINE_BACKPRESSURE, PIPELINE_SHED
+
+class Pipeline:
+    """
+    File bornée suivie de deux étapes ordonnées : `process` (anti-doublon,
+    comptage) pour chaque élément, puis `publish` (instantané) pour le lot
+    traité. Pleine, la file fait attendre les producteurs (contre-pression) ;
+    au-dessus du seuil haut, les instantanés sont délestés jusqu'à ce que la
+    file redescende sous le seuil bas, puis publiés une seule fois.
+    """
+
+    def __init__(self, name: str, process: Callable[[Any], Union[bool, Awaitable[bool]]],
+                 publish: Callable[[List[float]], None], maxsize: int = 1000,
+                 high_watermark: float = 0.5, low_watermark: float = 0.1):
+        self.name = name
+        self.process = process
+        self.publish = publish
+        self.maxsize = maxsize
+        self.high = max(1, int(maxsize * high_watermark))
+        self.low = int(maxsize * low_watermark)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker = None
+        self._held: List[float] = []   # réceptions comptées mais pas encore publiées
+        self._changed = False
+        self.shedding = False
+        self.processed = 0
+        self.shed = 0
+        self.blocked = 0
+
+    async def put(self, item: Any, received_at: Optional[float] = None):
+        """Ajoute un élément ; attend si la file est pleine"""
+        queue = self._ensure_started()
+        if queue.full():
+            self.blocked += 1
+            PIPELINE_BACKPRESSURE.inc(1, self.name)
+        await queue.put((item, received_at))
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def join(self):
+        """Attend la fin des traitements déjà en file"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def stop(self):
+        if self._worker: self._worker.cancel()
+        self._worker = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        return self._queue
+
+    async def _run(self):
+        while True:
+            item, received_at = await self._queue.get()
+            try:
+                result = self.process(item)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                self.processed += 1
+                if result:
+                    self._changed = True
+                    if received_at is not None:
+                        self._held.append(received_at)
+                self._publish_stage()
+            except Exception as ex:
+                print(f"❌ Erreur traitement {self.name} : {ex}")
+            finally:
+                self._queue.task_done()
+
+    def _publish_stage(self):
+        depth = self._queue.qsize()
+        if depth >= self.high:
+            if not self.shedding:
+                print(f"⚠️ File {self.name} saturée ({depth}/{self.maxsize}) : instantanés délestés")
+            self.shedding = True
+        elif depth <= self.low:
+            self.shedding = False
+        if not self._changed: return
+        if self.shedding:
+            self.shed += 1
+            PIPELINE_SHED.inc(1, self.name)
+            return
+        received, self._held, self._changed = self._held, [], False
+        self.publish(received)
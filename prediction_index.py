@@ -0,0 +1,92 @@
+import heapq
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Une prédiction N est vérifiée sur les jeux N, N+1 et N+2
+OFFSETS = 3
+STATUS_BY_OFFSET = ("✅0️⃣", "✅1️⃣", "✅2️⃣")
+
+def result_status(parsed, offset: int) -> str:
+    """Statut d'une prédiction résolue : 2 cartes dans chacun des deux premiers groupes → ✅ selon le décalage"""
+    ok = parsed.card_count(0) == 2 and parsed.card_count(1) == 2
+    return STATUS_BY_OFFSET[offset] if ok else "📌❌"
+
+class PredictionIndex:
+    """
+    Index numéro de jeu visé → prédictions en cours. Un résultat se résout par
+    une seule recherche dans un dictionnaire, quel que soit le nombre de
+    prédictions en attente ; les prédictions dépassées sont retirées via un tas.
+    """
+
+    def __init__(self):
+        # numéro visé → [(numéro prédit, décalage, clé)] trié par numéro prédit
+        self._targets: Dict[int, List[Tuple[int, int, Hashable]]] = {}
+        self._by_key: Dict[Hashable, int] = {}
+        self._deadlines: List[Tuple[int, Hashable]] = []  # (dernier numéro visé, clé)
+
+    @classmethod
+    def from_numbers(cls, predicted_numbers: Iterable[int]) -> "PredictionIndex":
+        index = cls()
+        for n in sorted(set(predicted_numbers)):
+            index.add(n, n)
+        return index
+
+    @staticmethod
+    def match_numbers(predicted_numbers: Iterable[int], game_number: int) -> Optional[Tuple[int, int, int]]:
+        """Comme match(), pour une simple liste de numéros prédits (sans construire d'index)"""
+        numbers = set(predicted_numbers)
+        for offset in range(OFFSETS - 1, -1, -1):
+            if game_number - offset in numbers:
+                return game_number - offset, offset, game_number - offset
+        return None
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._by_key
+
+    def keys(self) -> List[Hashable]:
+        return list(self._by_key)
+
+    def add(self, predicted: int, key: Hashable):
+        if key in self._by_key:
+            self.remove(key)
+        self._by_key[key] = predicted
+        for offset in range(OFFSETS):
+            entries = self._targets.get(predicted + offset)
+            if entries is None:
+                self._targets[predicted + offset] = [(predicted, offset, key)]
+            else:
+                entries.append((predicted, offset, key))
+                if entries[-2][0] > predicted:
+                    entries.sort(key=lambda e: e[0])
+        heapq.heappush(self._deadlines, (predicted + OFFSETS - 1, key))
+
+    def remove(self, key: Hashable) -> bool:
+        predicted = self._by_key.pop(key, None)
+        if predicted is None: return False
+        for offset in range(OFFSETS):
+            target = predicted + offset
+            entries = [e for e in self._targets.get(target, ()) if e[2] != key]
+            if entries:
+                self._targets[target] = entries
+            else:
+                self._targets.pop(target, None)
+        return True
+
+    def match(self, game_number: int) -> Optional[Tuple[int, int, Hashable]]:
+        """(numéro prédit, décalage, clé) de la plus ancienne prédiction visant ce jeu"""
+        entries = self._targets.get(game_number)
+        return entries[0] if entries else None
+
+    def expire_before(self, game_number: int) -> List[Tuple[int, Hashable]]:
+        """Retire et retourne (numéro prédit, clé) des prédictions dont tous les jeux visés sont antérieurs à game_number"""
+        expired = []
+        while self._deadlines and self._deadlines[0][0] < game_number:
+            deadline, key = heapq.heappop(self._deadlines)
+            predicted = self._by_key.get(key)
+            # Entrée périmée du tas (déjà vérifiée ou réindexée)
+            if predicted is None or predicted + OFFSETS - 1 != deadline: continue
+            self.remove(key)
+            expired.append((predicted, key))
+        return expired
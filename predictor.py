@@ -1,33 +1,74 @@
-import re
-from typing import Tuple, Optional, List
+from typing import Hashable, Tuple, Optional, List
+from card_parser import ParsedMessage, parse_game_number, parse_message
+from prediction_index import OFFSETS, PredictionIndex, result_status
 
 class CardPredictor:
     def __init__(self):
         self.prediction_status = {}
         self.prediction_messages = {}
         self.status_log = []
+        # Prédictions en attente (⌛) indexées par numéro de jeu visé
+        self.index = PredictionIndex()
 
     def reset(self):
         self.prediction_status.clear()
         self.prediction_messages.clear()
         self.status_log.clear()
+        self.index = PredictionIndex()
         print("Données de prédiction réinitialisées")
 
     def extract_game_number(self, msg: str) -> Optional[int]:
-        m = re.search(r"#N\s*(\d+)\.?|jeu\s*#?\s*(\d+)", msg, re.I)
-        return int(m.group(1) or m.group(2)) if m else None
+        return parse_game_number(msg)
 
-    def verify_prediction(self, msg: str) -> Tuple[Optional[bool], Optional[int]]:
-        if "⏰" in msg or "🕐" in msg: return None, None
-        if not any(t in msg for t in ("✅", "🔰", "❌", "⭕")): return None, None
-        gn = self.extract_game_number(msg)
-        if gn is None: return None, None
-        # logique existante non utilisée ici → laissée vide
-        return None, None
+    def add_prediction(self, n: int, key: Optional[Hashable] = None):
+        """
+        Enregistre une prédiction lancée pour le jeu n (vérifiée sur n, n+1, n+2).
+        key : identifiant rendu à la résolution (numéro de planification), n par défaut.
+        """
+        self.prediction_status[n] = "⌛"
+        self.index.add(n, n if key is None else key)
+
+    def set_status(self, n: int, status: str, key: Optional[Hashable] = None):
+        self.prediction_status[n] = status
+        self.status_log.append((n, status))
+        self.index.remove(n if key is None else key)
+
+    def resolve(self, msg) -> List[Tuple[Hashable, int, str]]:
+        """
+        Résultat finalisé → [(clé, numéro prédit, statut)] : d'abord les prédictions
+        dont tous les jeux visés sont passés (📌❌), puis celle visée par ce jeu.
+        Règles : jeu n, n+1 ou n+2 avec 2 cartes dans chacun des deux premiers
+        groupes → ✅0️⃣/✅1️⃣/✅2️⃣, sinon 📌❌.
+        """
+        parsed = msg if isinstance(msg, ParsedMessage) else parse_message(msg)
+        if parsed.is_pending or not parsed.has_result: return []
+        gn = parsed.game_number
+        if gn is None or not len(self.index): return []
+        resolved = []
+        for n, key in self.index.expire_before(gn):
+            self.set_status(n, "📌❌", key)
+            resolved.append((key, n, "📌❌"))
+        match = self.index.match(gn)
+        if match is not None and len(parsed.groups) >= 2:
+            n, offset, key = match
+            status = result_status(parsed, offset)
+            self.set_status(n, status, key)
+            resolved.append((key, n, status))
+        return resolved
+
+    def verify_prediction(self, msg) -> Tuple[Optional[bool], Optional[int]]:
+        """Résultat finalisé → (réussite, numéro prédit), ou (None, None) si aucune prédiction ne vise ce jeu"""
+        parsed = msg if isinstance(msg, ParsedMessage) else parse_message(msg)
+        resolved = self.resolve(parsed)
+        if not resolved: return None, None
+        _, n, status = resolved[-1]
+        # Seulement des expirations : aucun jeu visé ne correspond à ce résultat
+        if n + OFFSETS - 1 < parsed.game_number: return None, None
+        return status != "📌❌", n
 
     def store_prediction_message(self, n: int, mid: int, cid: int):
         self.prediction_messages[n] = {"message_id": mid, "chat_id": cid}
 
     def get_prediction_message(self, n: int):
         return self.prediction_messages.get(n)
-        
+
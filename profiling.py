@@ -0,0 +1,118 @@
+import asyncio, cProfile, io, pstats, time, tracemalloc
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+# Ordre d'affichage des étapes du chemin critique
+STAGES = ("parse", "dedup_lookup", "counter_update", "dedup_persist", "report_build", "send",
+          "handle_new", "handle_edited", "submit_wait", "process_finalized")
+
+class StageTimer:
+    """
+    Durées des étapes du traitement des messages, conservées sur une fenêtre
+    glissante (les `window` dernières mesures par étape) pour les p50/p95/p99.
+    """
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def lap(self, stage: str, started: float) -> float:
+        """Enregistre l'étape commencée à `started` (perf_counter) et retourne l'instant courant"""
+        now = time.perf_counter()
+        self.record(stage, now - started)
+        return now
+
+    def percentiles(self, stage: str) -> Optional[Tuple[float, float, float]]:
+        samples = self._samples.get(stage)
+        if not samples: return None
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return tuple(ordered[int(round(q * last))] for q in (0.50, 0.95, 0.99))
+
+    def reset(self):
+        self._samples.clear()
+        self._counts.clear()
+
+    def report(self) -> str:
+        lines = ["⏱️ Étapes (ms) : p50 / p95 / p99 (n)"]
+        known = [s for s in STAGES if s in self._samples] + sorted(set(self._samples) - set(STAGES))
+        for stage in known:
+            p50, p95, p99 = self.percentiles(stage)
+            lines.append(f"• {stage} : {p50 * 1000:.2f} / {p95 * 1000:.2f} / {p99 * 1000:.2f} ({self._counts[stage]})")
+        if not known:
+            lines.append("Aucune mesure pour l'instant")
+        return "\n".join(lines)
+
+class ProfileCapture:
+    """Capture cProfile (cpu) ou tracemalloc (mem) pendant N secondes, une seule à la fois"""
+
+    KINDS = ("cpu", "mem")
+
+    def __init__(self, top: int = 15):
+        self.top = top
+        self.kind: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._profiler: Optional[cProfile.Profile] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, kind: str, seconds: float, on_done: Callable[[str], Awaitable[None]]):
+        if kind not in self.KINDS:
+            raise ValueError(f"type de capture inconnu : {kind}")
+        if self.running:
+            raise RuntimeError(f"capture {self.kind} déjà en cours")
+        self.kind = kind
+        if kind == "cpu":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            tracemalloc.start(10)
+        self._task = asyncio.ensure_future(self._run(seconds, on_done))
+
+    def stop(self) -> bool:
+        """Arrête la capture avant l'échéance (le résultat est tout de même envoyé)"""
+        if not self.running: return False
+        self._task.cancel()
+        return True
+
+    async def _run(self, seconds: float, on_done: Callable[[str], Awaitable[None]]):
+        started = time.monotonic()
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            pass
+        result = self._finish(time.monotonic() - started)
+        try:
+            await on_done(result)
+        except Exception as ex:
+            print(f"❌ Envoi du profil impossible : {ex}")
+
+    def _finish(self, elapsed: float) -> str:
+        out = io.StringIO()
+        if self.kind == "cpu":
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler, stream=out)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            self._profiler = None
+            body = "\n".join(l for l in out.getvalue().splitlines() if l.strip())
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"actuel {current / 1024:.0f} Ko, pic {peak / 1024:.0f} Ko"]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top]]
+            body = "\n".join(lines)
+        return f"🔬 Profil {self.kind} ({elapsed:.1f}s)\n{body}"
+
+stage_timer = StageTimer()
+profile_capture = ProfileCapture()
@@ -0,0 +1,97 @@
+import asyncio, time
+from typing import Callable, List, Optional
+from telethon.errors import MessageIdInvalidError, MessageNotModifiedError
+from metrics import END_TO_END_LATENCY
+from profiling import stage_timer
+from outbound import PRIORITY_SNAPSHOT
+
+class InstantReportPublisher:
+    """
+    Publie le compteur instantané en éditant un seul message épinglé du canal
+    d'affichage. Les demandes sont regroupées : au plus une mise à jour par
+    intervalle, toujours avec l'état le plus récent du compteur.
+    """
+
+    def __init__(self, client, settings, build_report: Callable[[], str],
+                 get_chat: Callable[[], Optional[int]], interval: float = 10.0,
+                 key: str = "instant_message"):
+        self.client = client
+        self.settings = settings
+        self.build_report = build_report
+        self.get_chat = get_chat
+        self.interval = interval
+        self.key = key  # clé de configuration : {"chat_id", "message_id"} du message épinglé
+        self._event = asyncio.Event()
+        self._task = None
+        self._last_publish = 0.0
+        self._last_text = None
+        self._received: List[float] = []  # réception (time.monotonic) des messages pas encore affichés
+        self.requests = 0
+        self.publishes = 0
+
+    def notify(self, received_at: Optional[float] = None):
+        """Signale un changement du compteur (ne bloque jamais)"""
+        self.requests += 1
+        if received_at is not None:
+            self._received.append(received_at)
+        self._event.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._event.wait()
+            delay = self._last_publish + self.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Toutes les demandes arrivées pendant l'attente sont couvertes par cette publication
+            self._event.clear()
+            self._last_publish = loop.time()
+            received, self._received = self._received, []
+            try:
+                await self.publish()
+            except Exception as ex:
+                print(f"❌ Erreur publication instantané : {ex}")
+                continue
+            done = time.monotonic()
+            for t in received:
+                END_TO_END_LATENCY.observe(done - t)
+
+    async def publish(self):
+        chat_id = self.get_chat()
+        if not chat_id: return
+        chat_id = int(chat_id)
+        t = time.perf_counter()
+        text = self.build_report()
+        t = stage_timer.lap("report_build", t)
+        ref = self.settings.get(self.key) or {}
+        if ref.get("chat_id") == chat_id and ref.get("message_id"):
+            if text == self._last_text: return
+            try:
+                await self.client.edit_message(chat_id, ref["message_id"], text, priority=PRIORITY_SNAPSHOT)
+                stage_timer.lap("send", t)
+                self._last_text = text
+                self.publishes += 1
+                print(f"📈 Instantané mis à jour (message {ref['message_id']})")
+                return
+            except MessageNotModifiedError:
+                self._last_text = text
+                return
+            except MessageIdInvalidError:
+                # Message supprimé : en publier un nouveau
+                print(f"⚠️ Instantané {ref['message_id']} introuvable, nouveau message")
+            except Exception as ex:
+                # Échec passager (réseau, circuit ouvert…) : le message reste, la prochaine demande réessaiera
+                print(f"⚠️ Édition de l'instantané impossible : {ex}")
+                return
+        sent = await self.client.send_message(chat_id, text, priority=PRIORITY_SNAPSHOT)
+        stage_timer.lap("send", t)
+        self._last_text = text
+        self.publishes += 1
+        self.settings.set(self.key, {"chat_id": chat_id, "message_id": sent.id})
+        try:
+            await self.client.pin_message(chat_id, sent.id, notify=False, priority=PRIORITY_SNAPSHOT)
+        except Exception as ex:
+            print(f"⚠️ Épinglage de l'instantané impossible : {ex}")
+        print(f"📌 Nouvel instantané publié (message {sent.id})")
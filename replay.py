@@ -0,0 +1,155 @@
+"""
+Banc de rejeu hors ligne : rejoue un corpus de messages du canal de
+statistiques (nouveaux + éditions) dans handle_new / handle_edited avec un
+faux client Telegram, puis affiche débit, latences et totaux.
+
+    python replay.py --games 5000 --pending-ratio 0.5 --latency 0.02,0.1
+    python replay.py --corpus messages.jsonl --json
+
+Format du corpus (JSONL) : {"event": "new" | "edit", "id": 12, "text": "...", "chat_id": -100...}
+(chat_id optionnel : canal de statistiques configuré par défaut).
+"""
+import argparse, asyncio, json, os, random, shutil, sys, tempfile, time
+from typing import Dict, Iterator, List, Optional
+
+SUIT_CHOICES = ("♠️", "♥️", "♦️", "♣️")
+RANKS = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+
+def _hand(rng: random.Random) -> str:
+    cards = "".join(rng.choice(RANKS) + rng.choice(SUIT_CHOICES) for _ in range(rng.randint(2, 3)))
+    return f"{rng.randint(0, 9)}({cards})"
+
+def synthetic_corpus(games: int, pending_ratio: float = 0.5, duplicate_ratio: float = 0.02,
+                     edit_delay: int = 5, seed: int = 0) -> Iterator[Dict]:
+    """
+    Corpus synthétique : une partie par message ; une part `pending_ratio` est
+    d'abord publiée ⏰ puis éditée ✅/🔰 `edit_delay` messages plus tard.
+    """
+    rng = random.Random(seed)
+    waiting: List[tuple] = []  # (échéance, id, texte final)
+    next_id = 1
+    for n in range(1, games + 1):
+        first, second = _hand(rng), _hand(rng)
+        final = f"#N{n}. {rng.choice('✅🔰')}{first} - {second} #T{rng.randint(10, 40)}"
+        if rng.random() < pending_ratio:
+            yield {"event": "new", "id": next_id, "text": f"#N{n}. ⏰{first} - {second}"}
+            waiting.append((n + edit_delay, next_id, final))
+        else:
+            yield {"event": "new", "id": next_id, "text": final}
+            if rng.random() < duplicate_ratio:
+                next_id += 1
+                yield {"event": "new", "id": next_id, "text": final}
+        next_id += 1
+        while waiting and waiting[0][0] <= n:
+            _, message_id, text = waiting.pop(0)
+            yield {"event": "edit", "id": message_id, "text": text}
+    for _, message_id, text in waiting:
+        yield {"event": "edit", "id": message_id, "text": text}
+
+def load_corpus(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _percentiles(samples: List[float]) -> Optional[Dict[str, float]]:
+    if not samples: return None
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {f"p{int(q * 100)}": ordered[int(round(q * last))] * 1000 for q in (0.50, 0.95, 0.99)}
+
+async def replay(events: List[Dict], latency=(0.0, 0.0), flood_rate: float = 0.0,
+                 publish_interval: float = 1.0, rate: float = 0.0, seed: int = 0) -> Dict:
+    import main
+    from fake_telegram import FakeTelegramClient
+    from metrics import END_TO_END_LATENCY, MESSAGES_DEDUPLICATED, MESSAGES_FINALIZED
+    from persister import persister
+
+    fake = main.attach_client(FakeTelegramClient(latency=latency, flood_rate=flood_rate, seed=seed))
+    main.live_ready.set()
+    for route in main.router.routes.values():
+        for publisher in route.publishers:
+            publisher.interval = publish_interval
+    default_chat = main.detected_stat_channel
+
+    handler_latency = {"new": [], "edit": []}
+    started = time.perf_counter()
+    for i, item in enumerate(events):
+        kind = item.get("event", "new")
+        e = fake.event(item.get("chat_id") or default_chat, int(item["id"]), item["text"])
+        t = time.perf_counter()
+        await (main.handle_edited(e) if kind == "edit" else main.handle_new(e))
+        handler_latency[kind].append(time.perf_counter() - t)
+        if rate > 0:
+            await asyncio.sleep(max(0.0, started + (i + 1) / rate - time.perf_counter()))
+        elif i % 200 == 199:
+            await asyncio.sleep(0)  # laisser tourner les files des routes
+    for route in main.router.routes.values():
+        await route.join()
+    elapsed = time.perf_counter() - started
+    # Laisser partir la dernière publication groupée de l'instantané
+    await asyncio.sleep(publish_interval + latency[1] + 0.1)
+    persister.flush()
+
+    e2e_count = END_TO_END_LATENCY.count()
+    e2e_sum = END_TO_END_LATENCY.total()
+    return {
+        "events": len(events),
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(len(events) / elapsed, 1) if elapsed else None,
+        "handler_latency_ms": {k: _percentiles(v) for k, v in handler_latency.items()},
+        "stages": main.stage_timer.report(),
+        "end_to_end_mean_ms": round(e2e_sum / e2e_count * 1000, 2) if e2e_count else None,
+        "finalized": MESSAGES_FINALIZED.value(),
+        "deduplicated": MESSAGES_DEDUPLICATED.value(),
+        "pending_left": len(main.pending_messages),
+        "totals": {name: dict(r.counter._TOTAL) for name, r in main.router.routes.items()},
+        "telegram_calls": dict(fake.calls),
+        "flood_waits": main.outbound.flood_waits,
+        "send_failures": main.outbound.failed,
+    }
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Rejeu hors ligne des messages du canal de statistiques")
+    parser.add_argument("--corpus", help="fichier JSONL enregistré (sinon corpus synthétique)")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--pending-ratio", type=float, default=0.5)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.02)
+    parser.add_argument("--latency", default="0,0", help="latence API simulée min,max en secondes")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="probabilité de FloodWait par appel")
+    parser.add_argument("--publish-interval", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=0.0, help="événements/s (0 = au plus vite)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="dossier de données (par défaut : dossier temporaire supprimé)")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args(argv)
+
+    # Le stockage est lu à l'import de main : le dossier doit être fixé avant
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="replay-")
+    os.environ["BOT_DATA_DIR"] = data_dir
+    os.environ.setdefault("PERSIST_FLUSH_INTERVAL", "0.2")
+    events = list(load_corpus(args.corpus) if args.corpus else
+                  synthetic_corpus(args.games, args.pending_ratio, args.duplicate_ratio, seed=args.seed))
+    latency = tuple(float(x) for x in args.latency.split(","))
+    try:
+        result = asyncio.run(replay(events, latency, args.flood_rate, args.publish_interval, args.rate, args.seed))
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"\n📼 {result['events']} événements en {result['elapsed_s']}s → {result['events_per_s']} évt/s")
+    for kind, p in result["handler_latency_ms"].items():
+        if p:
+            print(f"   {kind} : p50 {p['p50']:.3f} ms, p95 {p['p95']:.3f} ms, p99 {p['p99']:.3f} ms")
+    print(result["stages"])
+    print(f"🏁 Finalisés {result['finalized']}, doublons {result['deduplicated']}, en attente {result['pending_left']}")
+    print(f"   Bout en bout (moyenne) : {result['end_to_end_mean_ms']} ms")
+    for name, totals in result["totals"].items():
+        print(f"   {name} : " + " ".join(f"{s}{n}" for s, n in totals.items()))
+    print(f"   Appels Telegram {result['telegram_calls']}, FloodWait {result['flood_waits']}, échecs {result['send_failures']}")
+
+if __name__ == "__main__":
+    main_cli(sys.argv[1:])
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from card_counter import CardCounter
+from publisher import InstantReportPublisher
+from outbound import PRIORITY_BILAN
+from pipeline import Pipeline
+
+DEFAULT_ROUTE = "principal"
+
+class Route:
+    """
+    Une table de jeu : N canaux sources → M canaux d'affichage, avec son propre
+    compteur, son propre bilan automatique et sa propre file de traitement (bornée).
+    """
+
+    def __init__(self, name: str, sources: Iterable[int], displays: Iterable[int], bilan_interval: int,
+                 outbound, settings, instant_interval: float, queue_size: int = 1000):
+        self.name = name
+        self.outbound = outbound
+        self.settings = settings
+        self.instant_interval = instant_interval
+        self.counter = CardCounter()
+        self.sources: List[int] = []
+        self.displays: List[int] = []
+        self.bilan_interval = bilan_interval
+        self.publishers: List[InstantReportPublisher] = []
+        self.pipeline = Pipeline(name, self._process, self._publish, maxsize=queue_size)
+        self._bilan_task = None
+        self.update(sources, displays, bilan_interval)
+
+    def update(self, sources: Iterable[int], displays: Iterable[int], bilan_interval: Optional[int] = None):
+        self.sources = [int(s) for s in sources if s]
+        self.displays = [int(d) for d in displays if d]
+        if bilan_interval:
+            self.bilan_interval = max(1, min(int(bilan_interval), 120))
+        # Un message épinglé par canal d'affichage
+        while len(self.publishers) < len(self.displays):
+            i = len(self.publishers)
+            key = "instant_message" if self.name == DEFAULT_ROUTE and i == 0 else f"instant_message:{self.name}:{i}"
+            self.publishers.append(InstantReportPublisher(
+                self.outbound, self.settings, self.counter.build_report,
+                lambda i=i: self.displays[i] if i < len(self.displays) else None,
+                interval=self.instant_interval, key=key))
+
+    def spec(self) -> Dict[str, Any]:
+        return {"name": self.name, "sources": self.sources, "displays": self.displays,
+                "bilan_interval": self.bilan_interval}
+
+    # ---- traitement isolé par route ----
+    async def submit(self, func: Callable, *args, received_at: Optional[float] = None):
+        """
+        Met un traitement dans la file de la route (exécuté dans l'ordre) ; attend
+        si la file est pleine. func retourne True si le compteur a changé :
+        l'instantané est alors publié par l'étape suivante.
+        """
+        await self.pipeline.put((func, args), received_at)
+
+    @property
+    def processed(self) -> int:
+        return self.pipeline.processed
+
+    def depth(self) -> int:
+        return self.pipeline.depth()
+
+    async def join(self):
+        """Attend la fin des traitements déjà en file"""
+        await self.pipeline.join()
+
+    @staticmethod
+    async def _process(item) -> bool:
+        func, args = item
+        result = func(*args)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return bool(result)
+
+    def _publish(self, received: List[float]):
+        if not received:
+            self.notify()
+        for t in received:
+            self.notify(t)
+
+    def notify(self, received_at: Optional[float] = None):
+        for p in self.publishers:
+            p.notify(received_at)
+
+    # ---- bilan automatique ----
+    def restart_bilan(self):
+        if self._bilan_task: self._bilan_task.cancel()
+        self._bilan_task = asyncio.ensure_future(self._bilan_loop())
+
+    async def _bilan_loop(self):
+        while True:
+            # Prochaine échéance alignée sur l'intervalle depuis minuit (60 min → chaque heure pile)
+            now = datetime.now()
+            midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            step = timedelta(minutes=self.bilan_interval)
+            next_run = midnight + step * ((now - midnight) // step + 1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            if not self.displays: continue
+            msg = self.counter.report_and_reset()  # envoie + reset de la période
+            # Mis en file avec la priorité la plus haute, sans attendre le réseau
+            for display in self.displays:
+                self.outbound.send_message(display, msg, priority=PRIORITY_BILAN)
+            print(f"📊 Bilan [{self.name}] mis en file à {next_run.strftime('%H:%M')}")
+
+    def stop(self):
+        self.pipeline.stop()
+        if self._bilan_task: self._bilan_task.cancel()
+        self._bilan_task = None
+
+class Router:
+    """Aiguillage des canaux sources vers les routes (un canal source n'appartient qu'à une route)"""
+
+    def __init__(self, outbound, settings, instant_interval: float, queue_size: int = 1000):
+        self.outbound = outbound
+        self.settings = settings
+        self.instant_interval = instant_interval
+        self.queue_size = queue_size
+        self.routes: Dict[str, Route] = {}
+        self._by_source: Dict[int, Route] = {}
+
+    def add(self, name: str, sources: Iterable[int], displays: Iterable[int], bilan_interval: int) -> Route:
+        """Crée la route ou met à jour ses canaux (le compteur est conservé)"""
+        sources = [int(s) for s in sources if s]
+        for s in sources:
+            owner = self._by_source.get(s)
+            if owner is not None and owner.name != name:
+                raise ValueError(f"le canal {s} appartient déjà à la route {owner.name}")
+        route = self.routes.get(name)
+        if route is None:
+            route = self.routes[name] = Route(name, sources, displays, bilan_interval,
+                                              self.outbound, self.settings, self.instant_interval,
+                                              queue_size=self.queue_size)
+        else:
+            route.update(sources, displays, bilan_interval)
+        self._reindex()
+        return route
+
+    def remove(self, name: str) -> bool:
+        route = self.routes.pop(name, None)
+        if route is None: return False
+        route.stop()
+        self._reindex()
+        return True
+
+    def _reindex(self):
+        self._by_source = {s: r for r in self.routes.values() for s in r.sources}
+
+    def route_for(self, chat_id: int) -> Optional[Route]:
+        return self._by_source.get(chat_id)
+
+    def get(self, name: Optional[str] = None) -> Optional[Route]:
+        return self.routes.get(name or DEFAULT_ROUTE)
+
+    def sources(self) -> List[int]:
+        return list(self._by_source)
+
+    def start(self):
+        for route in self.routes.values():
+            route.restart_bilan()
+
+    def specs(self) -> List[Dict[str, Any]]:
+        """Routes additionnelles à sauvegarder (la route principale vient de stat/display_channel)"""
+        return [r.spec() for r in self.routes.values() if r.name != DEFAULT_ROUTE]
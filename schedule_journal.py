@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+import yaml
+from persister import WriteBehindPersister, persister as default_persister
+
+class ScheduleJournal:
+    """
+    Planification persistée par un journal en ajout seul : une ligne JSON par
+    changement d'état (added, launched, verified, archived), numérotée. La
+    première ligne est un instantané complet ; le journal est compacté (réécrit
+    à partir de l'état courant) quand il dépasse `compact_every` événements.
+    """
+
+    def __init__(self, journal_file: Path, legacy_file: Optional[Path] = None, compact_every: int = 500,
+                 persister: Optional[WriteBehindPersister] = None):
+        self.journal_file = Path(journal_file)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.compact_every = compact_every
+        self.persister = persister or default_persister
+        self.seq = 0
+        self.events = 0  # événements écrits depuis le dernier instantané
+
+    @staticmethod
+    def apply(state: Dict[str, Any], op: str, numero: str, fields: Dict[str, Any]):
+        if op == "added":
+            state[numero] = dict(fields)
+        elif op == "archived":
+            state.pop(numero, None)
+        elif numero in state:
+            state[numero].update(fields)
+
+    # ---- chargement ----
+    def load(self) -> Dict[str, Any]:
+        """Instantané + événements suivants ; importe l'ancien prediction.yaml si le journal n'existe pas"""
+        # Événements encore en attente d'écriture : sans eux, état et numérotation repartiraient en arrière
+        self.persister.flush()
+        if not self.journal_file.exists():
+            return self._migrate()
+        state: Dict[str, Any] = {}
+        self.seq = self.events = 0
+        with open(self.journal_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # ligne tronquée (crash)
+                seq = event.get("seq", 0)
+                if event.get("op") == "snapshot":
+                    state, self.seq, self.events = event.get("data") or {}, seq, 0
+                    continue
+                if seq <= self.seq: continue  # déjà inclus dans l'instantané
+                self.apply(state, event.get("op"), event.get("numero"), event.get("data") or {})
+                self.seq = seq
+                self.events += 1
+        return state
+
+    def _migrate(self) -> Dict[str, Any]:
+        if not self.legacy_file or not self.legacy_file.exists(): return {}
+        with open(self.legacy_file, encoding="utf-8") as f:
+            state = yaml.safe_load(f) or {}
+        self.compact(state)
+        print(f"✅ {len(state)} entrées migrées de {self.legacy_file} vers {self.journal_file}")
+        return state
+
+    # ---- écriture ----
+    def record(self, op: str, numero: str, fields: Optional[Dict[str, Any]] = None) -> bool:
+        """Ajoute un événement ; retourne True quand une compaction est due"""
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "op": op, "numero": numero, "data": fields or {}}, ensure_ascii=False)
+        self.persister.append(self.journal_file, line + "\n")
+        self.events += 1
+        return self.events >= self.compact_every
+
+    def compact(self, state: Dict[str, Any]):
+        """
+        Remplace le journal par un instantané de l'état. La copie (entrées à plat)
+        est immédiate ; la sérialisation et l'écriture se font dans le thread d'écriture.
+        """
+        snapshot, seq = {numero: dict(data) for numero, data in state.items()}, self.seq
+        self.persister.write(self.journal_file, lambda: json.dumps(
+            {"seq": seq, "op": "snapshot", "data": snapshot}, ensure_ascii=False) + "\n")
+        self.events = 0
@@ -1,15 +1,39 @@
 import random
 import asyncio
-import yaml
-import os
+import heapq
+import itertools
+import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from telethon import TelegramClient
+from persister import persister
+from storage import DATA_DIR
+from card_parser import ParsedMessage, count_suits, parse_message
+from outbound import PRIORITY_EDIT
+from prediction_index import PredictionIndex, result_status
+from schedule_journal import ScheduleJournal
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Retard maximal toléré pour un lancement manqué (bot arrêté, boucle bloquée)
+MISSED_LAUNCH_GRACE = timedelta(minutes=5)
+# Nouvel essai d'un lancement dont l'envoi a échoué (dans la limite de MISSED_LAUNCH_GRACE)
+LAUNCH_RETRY_DELAY = timedelta(seconds=30)
+# Délai de regroupement des éditions de statut (une seule édition par prédiction)
+EDIT_COALESCE_DELAY = 1.0
+# Horizon glissant : lancements futurs toujours planifiés sur les N prochaines heures
+HORIZON_HOURS = 12
+# Prédiction lancée restée sans résultat : 📌❌ après ce délai
+RESULT_TIMEOUT = timedelta(hours=2)
+# Réveil maximal de la boucle (complément de l'horizon, expirations)
+MAINTENANCE_INTERVAL = 300
+# Statuts définitifs : l'entrée quitte la planification pour l'archive
+FINAL_STATUSES = ("✅0️⃣", "✅1️⃣", "✅2️⃣", "📌❌", "⏭️")
 
 class PredictionScheduler:
     """Système de planification automatique des prédictions"""
     
-    def __init__(self, client: TelegramClient, predictor, source_channel_id: int, target_channel_id: int):
+    def __init__(self, client: TelegramClient, predictor, source_channel_id: int, target_channel_id: int,
+                 outbound=None, horizon_hours: int = HORIZON_HOURS):
         """
         Initialise le planificateur
         
@@ -18,14 +42,33 @@ class PredictionScheduler:
             predictor: Instance du CardPredictor
             source_channel_id: ID du canal source pour vérification
             target_channel_id: ID du canal cible pour diffusion
+            outbound: File d'envoi (OutboundQueue) ; à défaut, envoi direct par le client
+            horizon_hours: Heures de lancements futurs maintenues en permanence
         """
         self.client = client
+        self.outbound = outbound
         self.predictor = predictor
         self.source_channel_id = source_channel_id
         self.target_channel_id = target_channel_id
+        # Journal des changements d'état (+ instantané) dans data/ ; l'ancien prediction.yaml
+        # (dossier courant) n'est plus lu qu'à la migration
         self.schedule_file = "prediction.yaml"
+        self.journal = ScheduleJournal(DATA_DIR / "prediction.journal", legacy_file=self.schedule_file)
+        # Entrées terminées (vérifiées, expirées, manquées) : une ligne JSON par entrée
+        self.archive_file = DATA_DIR / "prediction_archive.jsonl"
+        self.horizon_hours = horizon_hours
+        self.archived = 0
         self.is_running = False
         self.schedule_data = {}
+        # Tas des lancements (date absolue, ordre d'ajout, numéro) ; réveil anticipé via _wakeup
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        # Lancements en échec replanifiés : numéro → date du prochain essai
+        self._retry_at: Dict[str, datetime] = {}
+        # Éditions de statut en attente : numéro → (données, statut) ; seule la dernière est envoyée
+        self._pending_edits: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._edit_task = None
         
     def generate_next_prediction_time(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
         """Génère la prochaine prédiction avec lancement variable (1-4 min avant)"""
@@ -52,7 +95,9 @@ class PredictionScheduler:
             "chat_id": None,
             "launched": False,
             "verified": False,
-            "generated_at": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "generated_at": current_time.strftime(DATETIME_FORMAT),
+            "launch_at": launch_time.strftime(DATETIME_FORMAT),
+            "prediction_at": next_time.strftime(DATETIME_FORMAT),
             "launch_offset": launch_offset_minutes
         }
         
@@ -64,7 +109,7 @@ class PredictionScheduler:
         current_time = datetime.now()
         
         # Générer des prédictions toutes les heures avec lancement variable
-        num_predictions = 12  # 12 prédictions sur 12 heures
+        num_predictions = self.horizon_hours  # une prédiction par heure sur l'horizon
         
         for i in range(num_predictions):
             # Calculer l'heure de prédiction (toutes les heures)
@@ -92,7 +137,9 @@ class PredictionScheduler:
                 "chat_id": None,
                 "launched": False,
                 "verified": False,
-                "generated_at": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "generated_at": current_time.strftime(DATETIME_FORMAT),
+                "launch_at": launch_time.strftime(DATETIME_FORMAT),
+                "prediction_at": prediction_time.strftime(DATETIME_FORMAT),
                 "launch_offset": launch_offset_minutes
             }
         
@@ -101,25 +148,23 @@ class PredictionScheduler:
         return planification
     
     def save_schedule(self, schedule_data: Dict[str, Any]):
-        """Sauvegarde la planification dans le fichier YAML"""
-        try:
-            with open(self.schedule_file, "w", encoding='utf-8') as f:
-                yaml.dump(schedule_data, f, allow_unicode=True, default_flow_style=False)
-            print(f"✅ Planification sauvegardée dans {self.schedule_file}")
-        except Exception as e:
-            print(f"❌ Erreur sauvegarde planification: {e}")
+        """Instantané complet de la planification (compaction du journal, écrite par le thread du persister)"""
+        self.journal.compact(schedule_data)
+
+    def record(self, op: str, numero: str, **fields):
+        """Un changement d'état = une ligne ajoutée au journal ; instantané quand le journal est trop long"""
+        if self.journal.record(op, numero, fields):
+            self.save_schedule(self.schedule_data)
     
     def load_schedule(self) -> Dict[str, Any]:
-        """Charge la planification depuis le fichier YAML"""
+        """Charge la planification : dernier instantané + événements du journal"""
         try:
-            if os.path.exists(self.schedule_file):
-                with open(self.schedule_file, "r", encoding='utf-8') as f:
-                    data = yaml.safe_load(f) or {}
-                print(f"✅ Planification chargée: {len(data)} entrées")
-                return data
+            data = self.journal.load()
+            if data:
+                print(f"✅ Planification chargée: {len(data)} entrées ({self.journal.events} événements rejoués)")
             else:
                 print("ℹ️ Aucune planification existante, génération d'une nouvelle")
-                return {}
+            return data
         except Exception as e:
             print(f"❌ Erreur chargement planification: {e}")
             return {}
@@ -129,20 +174,92 @@ class PredictionScheduler:
         now = datetime.now()
         return now.strftime("%H:%M")
     
-    def get_pending_launches(self, current_time: str) -> list:
-        """Retourne les prédictions à lancer pour l'heure actuelle"""
-        pending = []
+    @staticmethod
+    def launch_datetime(data: Dict[str, Any]) -> Optional[datetime]:
+        """Date absolue de lancement (déduite de generated_at + heure_lancement pour les anciennes entrées)"""
+        try:
+            if data.get("launch_at"):
+                return datetime.strptime(data["launch_at"], DATETIME_FORMAT)
+            generated = datetime.strptime(data["generated_at"], DATETIME_FORMAT)
+            hour, minute = map(int, data["heure_lancement"].split(":"))
+            launch = generated.replace(hour=hour, minute=minute, second=0)
+            return launch if launch >= generated else launch + timedelta(days=1)
+        except (KeyError, ValueError):
+            return None
+
+    def prediction_datetime(self, data: Dict[str, Any]) -> Optional[datetime]:
+        if data.get("prediction_at"):
+            return datetime.strptime(data["prediction_at"], DATETIME_FORMAT)
+        launch = self.launch_datetime(data)
+        return launch + timedelta(minutes=data.get("launch_offset", 0)) if launch else None
+
+    def schedule_launch(self, numero: str, data: Dict[str, Any]):
+        """Ajoute l'entrée au tas des lancements et réveille la boucle si elle devient la prochaine"""
+        if data.get("launched") or data.get("statut") != "⌛": return
+        launch_at = self.launch_datetime(data)
+        if launch_at is None:
+            print(f"⚠️ Heure de lancement illisible pour {numero}, ignorée")
+            return
+        heapq.heappush(self._heap, (launch_at, next(self._seq), numero))
+        if self._heap[0][2] == numero:
+            self._wakeup.set()
+
+    def rebuild_launch_heap(self):
+        self._heap, self._retry_at = [], {}
         for numero, data in self.schedule_data.items():
-            if (data["heure_lancement"] == current_time and 
-                not data["launched"] and 
-                data["statut"] == "⌛"):
-                pending.append((numero, data))
-        return pending
+            self.schedule_launch(numero, data)
+        self._wakeup.set()
+
+    def _next_launch(self) -> Optional[Tuple[datetime, str]]:
+        """Prochain lancement valide (les entrées périmées du tas sont retirées au passage)"""
+        while self._heap:
+            launch_at, _, numero = self._heap[0]
+            data = self.schedule_data.get(numero)
+            if data is None or data.get("launched") or data.get("statut") != "⌛" or \
+                    launch_at not in (self.launch_datetime(data), self._retry_at.get(numero)):
+                heapq.heappop(self._heap)
+                continue
+            return launch_at, numero
+        return None
+
+    def pop_due_launches(self, now: Optional[datetime] = None) -> list:
+        """Retire du tas et retourne les prédictions dont l'heure de lancement est atteinte"""
+        now = now or datetime.now()
+        due = []
+        while True:
+            nxt = self._next_launch()
+            if nxt is None or nxt[0] > now: break
+            heapq.heappop(self._heap)
+            _, numero = nxt
+            self._retry_at.pop(numero, None)
+            launch_at = self.launch_datetime(self.schedule_data[numero])
+            if now - launch_at > MISSED_LAUNCH_GRACE:
+                self.skip_launch(numero, f"Lancement manqué pour {numero} (prévu à {launch_at:%H:%M}), ignoré")
+                continue
+            due.append((numero, self.schedule_data[numero]))
+        return due
+
+    def skip_launch(self, numero: str, reason: str):
+        """Lancement abandonné : ⏭️ puis archive (l'entrée ne reste pas ⌛ indéfiniment)"""
+        print(f"⏭️ {reason}")
+        self.schedule_data[numero]["statut"] = "⏭️"
+        self.archive_entry(numero)
+
+    def retry_launch(self, numero: str, now: Optional[datetime] = None):
+        """Replanifie un lancement en échec, ou l'abandonne si le délai de grâce serait dépassé"""
+        now = now or datetime.now()
+        retry_at = now + LAUNCH_RETRY_DELAY
+        if retry_at - self.launch_datetime(self.schedule_data[numero]) > MISSED_LAUNCH_GRACE:
+            self.skip_launch(numero, f"Lancement de {numero} abandonné après échecs répétés")
+            return
+        self._retry_at[numero] = retry_at
+        heapq.heappush(self._heap, (retry_at, next(self._seq), numero))
+        print(f"🔁 Nouvel essai du lancement {numero} à {retry_at:%H:%M:%S}")
     
-    def add_next_prediction(self):
-        """Ajoute une nouvelle prédiction à la planification"""
+    def add_next_prediction(self, after: Optional[datetime] = None):
+        """Ajoute une nouvelle prédiction à la planification (une heure après `after`, défaut maintenant)"""
         try:
-            new_prediction = self.generate_next_prediction_time()
+            new_prediction = self.generate_next_prediction_time(after)
             numero = new_prediction.pop("numero")
             
             # Éviter les doublons
@@ -155,7 +272,8 @@ class PredictionScheduler:
                 counter += 1
             
             self.schedule_data[numero] = new_prediction
-            self.save_schedule(self.schedule_data)
+            self.record("added", numero, **new_prediction)
+            self.schedule_launch(numero, new_prediction)
             
             print(f"✅ Nouvelle prédiction ajoutée: {numero} à {new_prediction['heure_lancement']}")
             return numero
@@ -164,37 +282,101 @@ class PredictionScheduler:
             print(f"❌ Erreur ajout prédiction: {e}")
             return None
     
+    def top_up_schedule(self, now: Optional[datetime] = None) -> int:
+        """Complète l'horizon glissant : une prédiction par heure jusqu'à now + horizon_hours"""
+        now = now or datetime.now()
+        horizon = now + timedelta(hours=self.horizon_hours)
+        future = [t for t in (self.prediction_datetime(d) for d in self.schedule_data.values()
+                              if d.get("statut") not in FINAL_STATUSES) if t]
+        # Entrées passées jamais lancées (arrêt du bot) : pas de rattrapage, l'horizon part de maintenant
+        last = max(future + [now])
+        added = 0
+        while last + timedelta(hours=1) <= horizon:
+            if self.add_next_prediction(after=last) is None: break
+            last += timedelta(hours=1)
+            added += 1
+        if added:
+            print(f"📅 Horizon complété : {added} prédiction(s) jusqu'à {last:%d/%m %H:%M}")
+        return added
+
+    def archive_entry(self, numero: str):
+        """Déplace une entrée terminée vers l'archive (ajout d'une ligne, sans réécriture)"""
+        data = self.schedule_data.pop(numero, None)
+        if data is None: return
+        self.record("archived", numero)
+        record = {"numero": numero, "statut": data.get("statut"), "launch_at": data.get("launch_at"),
+                  "prediction_at": data.get("prediction_at"), "format": data.get("prediction_format"),
+                  "message_id": data.get("message_id"), "archived_at": datetime.now().strftime(DATETIME_FORMAT)}
+        persister.append(self.archive_file, json.dumps(record, ensure_ascii=False) + "\n")
+        self.archived += 1
+
+    def prune_schedule(self, now: Optional[datetime] = None) -> int:
+        """Expire les prédictions restées sans résultat et archive toutes les entrées terminées"""
+        now = now or datetime.now()
+        for numero, data in list(self.schedule_data.items()):
+            if data.get("launched") and not data.get("verified"):
+                predicted_at = self.prediction_datetime(data)
+                if predicted_at and now - predicted_at > RESULT_TIMEOUT:
+                    self.mark_verified(numero, "📌❌")
+                    self.predictor.set_status(self.game_number(numero), "📌❌", key=numero)
+                    self.queue_status_edit(numero, data, "📌❌")
+        done = [n for n, d in self.schedule_data.items() if d.get("statut") in FINAL_STATUSES]
+        for numero in done:
+            self.archive_entry(numero)
+        return len(done)
+
+    @staticmethod
+    def game_number(numero: str) -> int:
+        """N0730 / N0730_1 → 730"""
+        return int(numero.lstrip("N").split("_")[0])
+
+    @property
+    def index(self) -> PredictionIndex:
+        """Prédictions lancées en attente de résultat : l'index du prédicteur (clé = numéro de planification)"""
+        return self.predictor.index
+
+    def rebuild_index(self):
+        """Indexe les prédictions lancées non vérifiées (après chargement de la planification)"""
+        for numero, data in self.schedule_data.items():
+            if data.get("launched") and not data.get("verified") and data.get("message_id") is not None:
+                self.predictor.add_prediction(self.game_number(numero), key=numero)
+
     def get_predictions_to_verify(self) -> list:
         """Retourne les prédictions à vérifier"""
-        to_verify = []
-        for numero, data in self.schedule_data.items():
-            if (data["launched"] and 
-                not data["verified"] and 
-                data["message_id"] is not None):
-                to_verify.append((numero, data))
-        return to_verify
+        return [(numero, self.schedule_data[numero]) for numero in self.index.keys()
+                if numero in self.schedule_data]
+
+    def mark_verified(self, numero: str, status: str) -> Optional[Dict[str, Any]]:
+        """Enregistre le résultat d'une prédiction dans la planification"""
+        data = self.schedule_data.get(numero)
+        if data is None: return None
+        data["verified"] = True
+        data["statut"] = status
+        self.record("verified", numero, verified=True, statut=status)
+        return data
+
     
     async def launch_prediction(self, numero: str, data: Dict[str, Any]):
         """Lance une prédiction automatique selon le nouveau format"""
         try:
-            # Vérifier les doublons avant de lancer
-            game_number = int(numero.replace('N', ''))
-            if game_number in self.predictor.prediction_status:
-                print(f"❌ Prédiction déjà existante pour {numero}, abandon du lancement automatique")
+            # Vérifier les doublons avant de lancer (une seule prédiction en attente par jeu)
+            game_number = self.game_number(numero)
+            if self.predictor.prediction_status.get(game_number) == '⌛':
+                self.skip_launch(numero, f"Prédiction déjà existante pour {numero}, abandon du lancement automatique")
                 return False
             
-            # Marquer comme prédiction automatique pour éviter les conflits
-            self.predictor.processed_messages.add(f"auto_prediction_{game_number}")
-            
             # Génère une prédiction aléatoire de couleurs (2K/2K format)
             suit_prediction = self.generate_suit_prediction()
             
             # Message de prédiction automatique selon le nouveau format demandé
-            game_number = int(numero.replace('N', ''))
             prediction_text = f"🔵{game_number} 🔵2D: {suit_prediction} :⏳"
             
             # Envoie le message au canal cible
-            sent_message = await self.client.send_message(self.target_channel_id, prediction_text)
+            if self.outbound:
+                sent_message = await self.outbound.send_message(self.target_channel_id, prediction_text,
+                                                                priority=PRIORITY_EDIT)
+            else:
+                sent_message = await self.client.send_message(self.target_channel_id, prediction_text)
             
             # Met à jour les données
             data["launched"] = True
@@ -203,22 +385,18 @@ class PredictionScheduler:
             data["prediction_format"] = suit_prediction
             
             # Ajouter à la prédiction status pour éviter les doublons
-            self.predictor.prediction_status[game_number] = '⌛'
+            self.predictor.add_prediction(game_number, key=numero)
             
-            # IMPORTANT: Mettre à jour le cooldown pour les prédictions automatiques
-            # Importer la variable globale depuis main
-            import main
-            main.last_rule_check = datetime.now()
-            print(f"🔄 Cooldown mis à jour après prédiction automatique {numero}")
-            
-            # Sauvegarde
-            self.save_schedule(self.schedule_data)
+            # Journal : une ligne, sans réécrire la planification
+            self.record("launched", numero, launched=True, message_id=sent_message.id,
+                        chat_id=self.target_channel_id, prediction_format=suit_prediction)
             
             print(f"🚀 Prédiction automatique lancée: {numero} ({suit_prediction}) à {data['heure_lancement']}")
             return True
             
         except Exception as e:
             print(f"❌ Erreur lancement prédiction {numero}: {e}")
+            self.retry_launch(numero)
             return False
     
     def generate_suit_prediction(self) -> str:
@@ -242,23 +420,64 @@ class PredictionScheduler:
         """
         print(f"🔍 Vérification du statut pour {numero}")
         
-        # Cette fonction sera appelée depuis le bot principal lors du traitement des messages
-        # Elle ne fait plus de requêtes API directes mais utilise les messages reçus
-        return False
+        # Les résultats arrivent par handle_result() (messages reçus, sans requête API) ;
+        # ici on reprend un statut déjà connu du prédicteur mais pas encore reporté
+        if data.get("verified"):
+            return True
+        status = self.predictor.prediction_status.get(self.game_number(numero))
+        if not status or status == '⌛':
+            return False
+        self.mark_verified(numero, status)
+        self.queue_status_edit(numero, data, status)
+        self.archive_entry(numero)
+        return True
+
+    def handle_result(self, message_text: Union[str, ParsedMessage]) -> list:
+        """
+        Résultat finalisé du canal source : le prédicteur expire les prédictions
+        dépassées et résout celle visée par ce jeu ; leur message est mis en file
+        d'édition. Retourne [(numéro, statut)].
+        """
+        resolved = []
+        for numero, _, status in self.predictor.resolve(message_text):
+            data = self.mark_verified(numero, status)
+            if data is None: continue  # prédiction hors planification
+            self.queue_status_edit(numero, data, status)
+            self.archive_entry(numero)
+            resolved.append((numero, status))
+        return resolved
+
+    def queue_status_edit(self, numero: str, data: Optional[Dict[str, Any]], status: str):
+        """Édition différée et regroupée : plusieurs statuts rapprochés → une seule édition par message"""
+        if not data: return
+        self._pending_edits[numero] = (data, status)
+        if self._edit_task is None or self._edit_task.done():
+            self._edit_task = asyncio.ensure_future(self._flush_edits())
+
+    async def _flush_edits(self):
+        while self._pending_edits:
+            await asyncio.sleep(EDIT_COALESCE_DELAY)
+            edits, self._pending_edits = self._pending_edits, {}
+            await asyncio.gather(*(self.update_prediction_message(numero, data, status)
+                                   for numero, (data, status) in edits.items()))
     
     async def update_prediction_message(self, numero: str, data: Dict[str, Any], new_status: str):
         """Met à jour le message de prédiction avec le nouveau statut"""
         try:
             if data["message_id"] and data["chat_id"]:
                 # Message mis à jour selon le nouveau format demandé
-                game_number = int(numero.replace('N', ''))
+                game_number = self.game_number(numero)
                 new_text = f"🔵{game_number} 🔵2D: statut :{new_status}"
 
-                await self.client.edit_message(
-                    data["chat_id"], 
-                    data["message_id"], 
-                    new_text
-                )
+                if self.outbound:
+                    await self.outbound.edit_message(data["chat_id"], data["message_id"], new_text,
+                                                     priority=PRIORITY_EDIT)
+                else:
+                    await self.client.edit_message(
+                        data["chat_id"], 
+                        data["message_id"], 
+                        new_text
+                    )
                 print(f"📝 Message automatique {numero} mis à jour: {new_status}")
         except Exception as e:
             print(f"❌ Erreur mise à jour message {numero}: {e}")
@@ -268,111 +487,92 @@ class PredictionScheduler:
         Vérifie si chaque groupe a exactement 2 cartes (symboles)
         Selon l'algorithme : ne compte que ♠️, ♣️, ♥️, ♦️
         """
-        def count_cards(symbols_str: str) -> int:
-            # Compter d'abord les versions emoji, puis les versions simples
-            emoji_symbols = ['♠️', '♥️', '♦️', '♣️']
-            simple_symbols = ['♠', '♥', '♦', '♣']
-            
-            temp_str = symbols_str
-            emoji_count = 0
-            
-            for emoji in emoji_symbols:
-                count = temp_str.count(emoji)
-                emoji_count += count
-                temp_str = temp_str.replace(emoji, 'X')
-            
-            simple_count = 0
-            for symbol in simple_symbols:
-                simple_count += temp_str.count(symbol)
-                
-            return emoji_count + simple_count
-        
-        count1 = count_cards(group1)
-        count2 = count_cards(group2)
+        count1 = sum(count_suits(group1))
+        count2 = sum(count_suits(group2))
         
         print(f"🃏 Comptage cartes: groupe1='{group1}'→{count1}, groupe2='{group2}'→{count2}")
         return count1 == 2 and count2 == 2
     
-    def verify_prediction_from_message(self, message_text: str, predicted_numbers: list) -> tuple:
+    def verify_prediction_from_message(self, message_text: Union[str, ParsedMessage],
+                                       predicted_numbers: Optional[list] = None) -> tuple:
         """
         Vérifie une prédiction selon l'algorithme spécifié :
         1. Cherche le numéro exact (offset 0) → ✅0️⃣
         2. Cherche le numéro suivant (offset 1) → ✅1️⃣  
         3. Cherche le numéro +2 (offset 2) → ✅2️⃣
         4. Sinon → 📌❌
+        Sans predicted_numbers, les prédictions en cours sont lues dans l'index
+        (une recherche par message, quel que soit leur nombre).
         """
-        import re
+        parsed = message_text if isinstance(message_text, ParsedMessage) else parse_message(message_text)
         
-        # Extrait le numéro du message
-        match = re.search(r"#N(\d+)\.", message_text)
-        if not match:
+        # Numéro du message
+        if parsed.game_number is None:
             return None, None
         
-        current_number = int(match.group(1))
+        current_number = parsed.game_number
         print(f"🔍 Message reçu pour #N{current_number}")
         
-        # Extrait les groupes de cartes entre parenthèses
-        groups = re.findall(r"\(([^)]*)\)", message_text)
+        # Groupes de cartes entre parenthèses
+        groups = parsed.groups
         if len(groups) < 2:
             print(f"❌ Groupes insuffisants dans le message: {groups}")
             return None, None
         
         group1, group2 = groups[0], groups[1]
         
-        # Vérifie si ce message correspond à une prédiction
-        for predicted_num in predicted_numbers:
-            # Offsets possibles : 0, 1, 2
-            for offset in range(3):
-                target_number = predicted_num + offset
-                
-                if current_number == target_number:
-                    print(f"🎯 Correspondance trouvée: prédiction N{predicted_num:03d} vs message N{current_number} (offset {offset})")
-                    
-                    # Vérifie la distribution des cartes
-                    if self.check_card_distribution(group1, group2):
-                        # Détermine le statut selon l'offset
-                        if offset == 0:
-                            status = "✅0️⃣"
-                        elif offset == 1:
-                            status = "✅1️⃣"
-                        else:  # offset == 2
-                            status = "✅2️⃣"
-                        
-                        print(f"✅ Prédiction réussie N{predicted_num:03d}: {status}")
-                        return predicted_num, status
-                    else:
-                        # Distribution incorrecte
-                        print(f"❌ Distribution incorrecte pour N{predicted_num:03d}")
-                        return predicted_num, "📌❌"
+        # Vérifie si ce message correspond à une prédiction (numéro prédit + offset 0, 1 ou 2)
+        if predicted_numbers is None:
+            match = self.index.match(current_number)
+        else:
+            match = PredictionIndex.match_numbers(predicted_numbers, current_number)
+        if match is None:
+            return None, None
+        predicted_num, offset, _ = match
+        print(f"🎯 Correspondance trouvée: prédiction N{predicted_num:03d} vs message N{current_number} (offset {offset})")
         
-        return None, None
+        # Vérifie la distribution des cartes (comptages déjà faits par le parseur)
+        count1, count2 = parsed.card_count(0), parsed.card_count(1)
+        print(f"🃏 Comptage cartes: groupe1='{group1}'→{count1}, groupe2='{group2}'→{count2}")
+        # Même règle que la résolution (CardPredictor.resolve)
+        status = result_status(parsed, offset)
+        if status == "📌❌":
+            print(f"❌ Distribution incorrecte pour N{predicted_num:03d}")
+        else:
+            print(f"✅ Prédiction réussie N{predicted_num:03d}: {status}")
+        return predicted_num, status
     
     async def run_scheduler(self):
         """Boucle principale du planificateur"""
         print("🚀 Démarrage du planificateur automatique")
         
-        # Charge ou génère la planification
+        # Charge la planification ; l'horizon glissant est complété à chaque tour
         self.schedule_data = self.load_schedule()
-        if not self.schedule_data:
-            self.schedule_data = self.generate_daily_schedule()
-            self.save_schedule(self.schedule_data)
         
         self.is_running = True
+        self.rebuild_launch_heap()
+        self.rebuild_index()
         
         while self.is_running:
             try:
-                current_time = self.get_current_time_slot()
-                
-                # Lance les prédictions en attente
-                pending_launches = self.get_pending_launches(current_time)
-                for numero, data in pending_launches:
+                self._wakeup.clear()
+                self.prune_schedule()
+                self.top_up_schedule()
+                # Lance les prédictions arrivées à échéance
+                for numero, data in self.pop_due_launches():
                     await self.launch_prediction(numero, data)
                 
                 # Les vérifications automatiques sont maintenant gérées 
                 # directement dans handle_messages() lors de la réception des messages
                 
-                # Attendre 30 secondes avant le prochain cycle
-                await asyncio.sleep(30)
+                # Dormir exactement jusqu'au prochain lancement, ou jusqu'à un ajout (add_next_prediction, regenerate_schedule)
+                nxt = self._next_launch()
+                timeout = MAINTENANCE_INTERVAL if nxt is None else \
+                    min(MAINTENANCE_INTERVAL, max(0.0, (nxt[0] - datetime.now()).total_seconds()))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 print(f"❌ Erreur dans le planificateur: {e}")
@@ -381,6 +581,7 @@ class PredictionScheduler:
     def stop_scheduler(self):
         """Arrête le planificateur"""
         self.is_running = False
+        self._wakeup.set()
         print("🛑 Planificateur arrêté")
     
     def get_schedule_status(self) -> Dict[str, Any]:
@@ -394,12 +595,8 @@ class PredictionScheduler:
         pending = total - launched
         
         # Prochaine prédiction
-        current_time = self.get_current_time_slot()
-        next_launch = None
-        for numero, data in self.schedule_data.items():
-            if not data["launched"] and data["heure_lancement"] > current_time:
-                next_launch = f"{numero} à {data['heure_lancement']}"
-                break
+        nxt = self._next_launch()
+        next_launch = f"{nxt[1]} à {nxt[0]:%H:%M:%S}" if nxt else None
         
         return {
             "total": total,
@@ -414,6 +611,7 @@ class PredictionScheduler:
         """Régénère une nouvelle planification quotidienne"""
         self.schedule_data = self.generate_daily_schedule()
         self.save_schedule(self.schedule_data)
+        self.rebuild_launch_heap()
         print("🔄 Nouvelle planification générée")
 
 # Exemple d'utilisation
@@ -426,4 +624,5 @@ if __name__ == "__main__":
     schedule = scheduler.generate_daily_schedule()
     scheduler.schedule_data = schedule
     scheduler.save_schedule(schedule)
-    print("✅ Exemple de planification généré dans prediction.yaml")
\ No newline at end of file
+    persister.flush()
+    print(f"✅ Exemple de planification généré dans {scheduler.journal.journal_file}")
\ No newline at end of file
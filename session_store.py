@@ -0,0 +1,90 @@
+"""
+Session Telethon stable : un seul fichier SQLite (data/<nom>.session) conserve
+la clé d'autorisation et le cache des entités d'un démarrage à l'autre. Plus
+de connexion complète par jeton à chaque redémarrage ni de fichiers
+bot_session_<horodatage>.session accumulés.
+
+Sur un disque éphémère (redéploiement Render), la variable TELEGRAM_SESSION
+(chaîne StringSession, affichée par `python session_store.py`) réamorce
+la session au premier démarrage.
+"""
+import glob, os, sys
+from pathlib import Path
+from typing import List, Optional
+from telethon.sessions import SQLiteSession, StringSession
+from storage import DATA_DIR
+
+# Anciens noms générés par main.py : un fichier par démarrage
+ORPHAN_PATTERN = "bot_session_*.session"
+
+def orphan_sessions(directory: Path = Path(".")) -> List[Path]:
+    """Anciennes sessions horodatées, de la plus récente à la plus ancienne"""
+    found = [Path(p) for p in glob.glob(str(Path(directory) / ORPHAN_PATTERN))]
+    return sorted(found, key=lambda p: p.stat().st_mtime, reverse=True)
+
+def _remove(session_file: Path, keep_session: bool = False):
+    paths = [session_file.with_name(session_file.name + "-journal")]
+    if not keep_session:
+        paths.append(session_file)
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+def _seed_from_string(target: Path, value: str) -> bool:
+    try:
+        string = StringSession(value.strip())
+    except ValueError as e:
+        print(f"⚠️ TELEGRAM_SESSION invalide, ignorée : {e}")
+        return False
+    session = SQLiteSession(str(target))
+    session.set_dc(string.dc_id, string.server_address, string.port)
+    session.auth_key = string.auth_key
+    session.save()
+    session.close()
+    return True
+
+def prepare_session(name: str, directory: Path = DATA_DIR, legacy_dir: Path = Path(".")) -> str:
+    """
+    Chemin de la session stable à passer à TelegramClient. Si elle n'existe pas
+    encore, elle est amorcée depuis TELEGRAM_SESSION ou reprise de la plus récente
+    session orpheline ; les autres orphelines sont supprimées.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{name}.session"
+    orphans = orphan_sessions(legacy_dir)
+    if not target.exists():
+        seed = os.getenv("TELEGRAM_SESSION")
+        if seed and _seed_from_string(target, seed):
+            print(f"✅ Session amorcée depuis TELEGRAM_SESSION → {target}")
+        elif orphans:
+            os.replace(orphans[0], target)
+            _remove(orphans[0], keep_session=True)
+            print(f"✅ Session {orphans[0].name} reprise → {target}")
+            orphans = orphans[1:]
+    for orphan in orphans:
+        _remove(orphan)
+    if orphans:
+        print(f"🧹 {len(orphans)} session(s) orpheline(s) supprimée(s)")
+    # Telethon ajoute lui-même l'extension .session
+    return str(directory / name)
+
+def export_string(name: str, directory: Path = DATA_DIR) -> Optional[str]:
+    """Clé d'autorisation de la session stable au format StringSession (à garder secrète)"""
+    target = Path(directory) / f"{name}.session"
+    if not target.exists(): return None
+    session = SQLiteSession(str(target))
+    try:
+        return StringSession.save(session) or None
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    import config
+    value = export_string(config.SESSION_NAME)
+    if value is None:
+        print(f"❌ Aucune session {DATA_DIR / config.SESSION_NAME}.session", file=sys.stderr)
+        sys.exit(1)
+    print(value)
@@ -0,0 +1,254 @@
+import os, yaml, json, sqlite3, threading, copy
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+from dedup_index import DedupIndex
+from persister import persister
+
+# Dossier des données persistantes (surchargeable pour les tests / relectures)
+DATA_DIR = Path(os.getenv("BOT_DATA_DIR", "data"))
+
+class StorageBackend:
+    """Interface commune des moteurs de stockage utilisés par YAMLDataManager"""
+    name = "abstract"
+
+    def get_config(self, key: str, default=None) -> Any:
+        raise NotImplementedError
+
+    def set_config(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def is_message_processed(self, message_hash: str) -> bool:
+        raise NotImplementedError
+
+    def mark_message_processed(self, message_hash: str, channel_id: int) -> None:
+        raise NotImplementedError
+
+    def load_document(self, name: str, default: Any = None) -> Any:
+        """Documents libres : 'predictions', 'auto_predictions'"""
+        raise NotImplementedError
+
+    def save_document(self, name: str, data: Any) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class YAMLStorage(StorageBackend):
+    """
+    Moteur historique : un fichier YAML par document, anti-doublon journalisé.
+    Les documents sont gardés en mémoire et écrits en différé par le persister.
+    """
+    name = "yaml"
+
+    def __init__(self, data_dir: Path = DATA_DIR):
+        self._docs = {}
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.config_file = self.data_dir / "bot_config.yaml"
+        self.message_log_file = self.data_dir / "message_log.yaml"
+        self.message_journal_file = self.data_dir / "message_log.journal"
+        self.documents = {
+            "predictions": (self.data_dir / "predictions.yaml", []),
+            "auto_predictions": (self.data_dir / "auto_predictions.yaml", {}),
+        }
+        self._init_files()
+        self.dedup = self._init_dedup()
+
+    def _init_files(self):
+        defaults = {self.config_file: {}}
+        defaults.update({path: default for path, default in self.documents.values()})
+        for file_path, default_content in defaults.items():
+            if not file_path.exists():
+                self._save_yaml(file_path, default_content)
+
+    def _init_dedup(self) -> DedupIndex:
+        """Charge l'index anti-doublon ; migre l'ancien message_log.yaml au premier démarrage"""
+        journal_exists = self.message_journal_file.exists()
+        index = DedupIndex(self.message_journal_file)
+        if not journal_exists and self.message_log_file.exists():
+            log = self._load_yaml(self.message_log_file)
+            if isinstance(log, list) and log:
+                index.seed((m["message_hash"], m.get("channel_id"), m.get("processed_at", ""))
+                           for m in log if isinstance(m, dict) and m.get("message_hash"))
+                print(f"✅ {len(index)} messages migrés vers {self.message_journal_file}")
+        return index
+
+    def _load_yaml(self, file_path: Path) -> Any:
+        if file_path in self._docs:
+            return self._docs[file_path]
+        try:
+            data = yaml.safe_load(file_path.read_text(encoding="utf-8")) or {} if file_path.exists() else {}
+        except Exception as e:
+            print(f"❌ Erreur chargement {file_path} : {e}")
+            return {}
+        self._docs[file_path] = data
+        return data
+
+    def _save_yaml(self, file_path: Path, data: Any):
+        self._docs[file_path] = data
+        snapshot = copy.deepcopy(data)
+        persister.write(file_path, lambda: yaml.dump(snapshot, allow_unicode=True, default_flow_style=False, indent=2))
+
+    def set_config(self, key: str, value: Any):
+        cfg = dict(self._load_yaml(self.config_file))
+        cfg[key] = {"value": value, "updated_at": datetime.now().isoformat()}
+        self._save_yaml(self.config_file, cfg)
+
+    def get_config(self, key: str, default=None):
+        cfg = self._load_yaml(self.config_file)
+        return cfg.get(key, {}).get("value", default)
+
+    def is_message_processed(self, message_hash: str) -> bool:
+        return message_hash in self.dedup
+
+    def mark_message_processed(self, message_hash: str, channel_id: int):
+        self.dedup.add_hash(message_hash, channel_id)
+
+    def load_document(self, name: str, default: Any = None) -> Any:
+        path, doc_default = self.documents[name]
+        data = self._load_yaml(path)
+        return data if data else (doc_default if default is None else default)
+
+    def save_document(self, name: str, data: Any):
+        self._save_yaml(self.documents[name][0], data)
+
+class SQLiteStorage(StorageBackend):
+    """Moteur SQLite (mode WAL) : écritures transactionnelles, tables indexées"""
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS config (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS message_log (
+        message_hash TEXT PRIMARY KEY,
+        channel_id INTEGER,
+        processed_at TEXT NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_message_log_processed_at ON message_log(processed_at);
+    CREATE TABLE IF NOT EXISTS documents (
+        name TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR, max_messages: int = 10000):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.data_dir / "bot.sqlite3"
+        self.max_messages = max_messages
+        self._inserts = 0
+        # Écritures en attente de validation groupée (thread d'écriture) ; les lectures les consultent d'abord
+        self._pending_messages = {}
+        self._pending_config = {}
+        self._pending_documents = {}
+        fresh = not self.db_file.exists()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        if fresh and (self.data_dir / "bot_config.yaml").exists():
+            self._import_yaml()
+
+    def _import_yaml(self):
+        """Reprend les données du moteur YAML lors de la bascule vers SQLite"""
+        legacy = YAMLStorage(self.data_dir)
+        cfg = legacy._load_yaml(legacy.config_file)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for key, entry in (cfg.items() if isinstance(cfg, dict) else []):
+                if isinstance(entry, dict) and "value" in entry:
+                    self._conn.execute("INSERT OR REPLACE INTO config(key, value, updated_at) VALUES (?, ?, ?)",
+                                       (key, json.dumps(entry["value"]), entry.get("updated_at", "")))
+            self._conn.executemany("INSERT OR IGNORE INTO message_log(message_hash, channel_id, processed_at) VALUES (?, ?, ?)",
+                                   ((h, c, t) for h, (c, t) in legacy.dedup._entries.items()))
+            for name in legacy.documents:
+                self._conn.execute("INSERT OR REPLACE INTO documents(name, data, updated_at) VALUES (?, ?, ?)",
+                                   (name, json.dumps(legacy.load_document(name), ensure_ascii=False), datetime.now().isoformat()))
+            self._conn.execute("COMMIT")
+        print(f"✅ Données YAML importées dans {self.db_file}")
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def set_config(self, key: str, value: Any):
+        self._pending_config[key] = (json.dumps(value), datetime.now().isoformat())
+        persister.defer(self.db_file, self._flush_pending)
+
+    def get_config(self, key: str, default=None):
+        pending = self._pending_config.get(key)
+        if pending is not None: return json.loads(pending[0])
+        rows = self._execute("SELECT value FROM config WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def is_message_processed(self, message_hash: str) -> bool:
+        if message_hash in self._pending_messages: return True
+        return bool(self._execute("SELECT 1 FROM message_log WHERE message_hash = ?", (message_hash,)))
+
+    def mark_message_processed(self, message_hash: str, channel_id: int):
+        self._pending_messages[message_hash] = (channel_id, datetime.now().isoformat())
+        persister.defer(self.db_file, self._flush_pending)
+
+    @staticmethod
+    def _discard(pending: dict, batch: list):
+        """Retire les entrées validées, sauf celles remplacées entre-temps"""
+        for key, value in batch:
+            if pending.get(key) is value:
+                pending.pop(key, None)
+
+    def _flush_pending(self):
+        """Validation groupée (thread d'écriture) : une transaction pour tout le lot"""
+        batch = list(self._pending_messages.items())
+        config = list(self._pending_config.items())
+        documents = list(self._pending_documents.items())
+        if not (batch or config or documents): return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR IGNORE INTO message_log(message_hash, channel_id, processed_at) VALUES (?, ?, ?)",
+                                   ((h, c, t) for h, (c, t) in batch))
+            self._conn.executemany("INSERT OR REPLACE INTO config(key, value, updated_at) VALUES (?, ?, ?)",
+                                   ((k, v, t) for k, (v, t) in config))
+            self._conn.executemany("INSERT OR REPLACE INTO documents(name, data, updated_at) VALUES (?, ?, ?)",
+                                   ((n, d, t) for n, (d, t) in documents))
+            self._conn.execute("COMMIT")
+        self._discard(self._pending_messages, batch)
+        self._discard(self._pending_config, config)
+        self._discard(self._pending_documents, documents)
+        before = self._inserts
+        self._inserts += len(batch)
+        if self._inserts // 1000 != before // 1000:
+            # Garder seulement les max_messages plus récents
+            self._execute("""DELETE FROM message_log WHERE processed_at < (
+                SELECT processed_at FROM message_log ORDER BY processed_at DESC LIMIT 1 OFFSET ?)""",
+                          (self.max_messages - 1,))
+
+    def load_document(self, name: str, default: Any = None) -> Any:
+        pending = self._pending_documents.get(name)
+        if pending is not None: return json.loads(pending[0])
+        rows = self._execute("SELECT data FROM documents WHERE name = ?", (name,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def save_document(self, name: str, data: Any):
+        self._pending_documents[name] = (json.dumps(data, ensure_ascii=False), datetime.now().isoformat())
+        persister.defer(self.db_file, self._flush_pending)
+
+    def close(self):
+        persister.flush()
+        with self._lock:
+            self._conn.close()
+
+BACKENDS = {YAMLStorage.name: YAMLStorage, SQLiteStorage.name: SQLiteStorage}
+
+def create_backend(name: Optional[str] = None, data_dir: Path = DATA_DIR) -> StorageBackend:
+    """Instancie le moteur choisi (variable STORAGE_BACKEND : yaml | sqlite)"""
+    name = (name or os.getenv("STORAGE_BACKEND") or "yaml").lower()
+    if name not in BACKENDS:
+        print(f"⚠️ Moteur de stockage inconnu '{name}', utilisation de yaml")
+        name = "yaml"
+    return BACKENDS[name](data_dir)